@@ -1,49 +1,63 @@
-from typing import TypedDict, List
+from typing import AsyncIterator, Optional, TypedDict, List
 from dotenv import load_dotenv
+import asyncio
+import logging
 import os
-import sys
-from pathlib import Path
-
-# Add ingestion folder to path for imports
-sys.path.append(str(Path(__file__).parent.parent / "ingestion"))
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
-from langchain_google_genai import ChatGoogleGenerativeAI
 
 from langchain_core.documents import Document
-from langchain_community.vectorstores import FAISS
-from gemini_embeddings import GeminiEmbeddings
+from langchain_core.runnables import RunnableLambda
+
+from agents import metrics
+from agents.resources import (
+    get_embeddings,
+    get_lexical_index,
+    get_llm,
+    get_shards,
+    get_vectorstore,
+    init_timings,
+)
+from agents.hybrid import LexicalResult, fuse, lexical_search
+from agents.direct_answer import direct_answer
+from db.database import SQLiteCheckpointer
+from agents.concurrency import limit, run_blocking
+from agents.pre_router import (
+    PRE_ROUTER_CENTROIDS,
+    PRE_ROUTER_ENABLED,
+    apre_route,
+    get_classifier,
+    pre_route,
+)
+from agents.profiler import profile_if_slow
+from agents.answer_cache import answer_cache
+from agents.sessions import SessionRegistry
 
 # --------------------------------------------------
 # ENV
 # --------------------------------------------------
 load_dotenv()
 
-# --------------------------------------------------
-# LLM — GEMINI TIER 1 (NO OPENROUTER, NO OPENAI)
-# --------------------------------------------------
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",  # Updated to available model
-    temperature=0,
-    streaming=True,   # Enable streaming for better UX
-    google_api_key=os.environ["GOOGLE_API_KEY"],
-)
+logger = logging.getLogger(__name__)
 
 # --------------------------------------------------
-# VECTORSTORE (already built)
+# LLM, EMBEDDINGS, VECTORSTORE
 # --------------------------------------------------
-VECTORSTORE_PATH = "data/processed/faiss_index"
+# Gemini chat model, embeddings and the FAISS index are built on first use
+# and shared by the process (agents/resources.py); see warm_up() below.
 
-embeddings = GeminiEmbeddings(model="models/embedding-001")
+RETRIEVER_K = 5
 
-vectorstore = FAISS.load_local(
-    VECTORSTORE_PATH,
-    embeddings=embeddings,
-    allow_dangerous_deserialization=True,
-)
+# Start retrieval in parallel with routing; the result is only used when
+# the route turns out to be "rag"
+SPECULATIVE_RETRIEVAL = os.getenv("SPECULATIVE_RETRIEVAL", "1") == "1"
 
-retriever = vectorstore.as_retriever(search_kwargs={"k": 5})
+speculative_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SPECULATIVE_WORKERS", "8")),
+    thread_name_prefix="speculative-retrieval",
+)
 
 # --------------------------------------------------
 # STATE
@@ -54,6 +68,10 @@ class AgentState(TypedDict):
     docs: List[Document]
     answer: str
     booking_slots: List[dict]  # For calendar slots
+    cache_hit: bool  # Answer served from the semantic answer cache
+    direct_answer: bool  # FAQ answer returned verbatim, no LLM call
+    category: str  # FAQ category whose shard was searched, "" for the global index
+    prefetched: bool  # docs/answer already filled in by speculative retrieval
 
 # --------------------------------------------------
 # ROUTER NODE
@@ -71,23 +89,305 @@ Classify the query into ONE word only:
 Return ONLY one word.
 """
 
-def router_node(state: AgentState) -> AgentState:
-    res = llm.invoke(
-        ROUTER_PROMPT + f"\n\nQuery: {state['query']}"
-    )
-
-    route = res.content.strip().lower()
+def parse_route(content: str) -> str:
+    route = content.strip().lower()
     if route not in {"rag", "contact", "booking", "greeting", "fallback"}:
         route = "fallback"
+    return route
+
+
+def llm_route(query: str) -> str:
+    res = get_llm().invoke(
+        ROUTER_PROMPT + f"\n\nQuery: {query}"
+    )
+    return parse_route(res.content)
+
+
+async def allm_route(query: str) -> str:
+    async with limit("gemini_llm"):
+        res = await get_llm().ainvoke(
+            ROUTER_PROMPT + f"\n\nQuery: {query}"
+        )
+    return parse_route(res.content)
+
+
+def query_vector(query: str) -> Optional[List[float]]:
+    """Embed the query once for both the centroid pre-router and retrieval.
+
+    None when the pre-router is off (retrieval embeds only if BM25 is
+    not enough) or the embedding call fails (each step retries alone).
+    """
+    if not (PRE_ROUTER_ENABLED and PRE_ROUTER_CENTROIDS):
+        return None
+    try:
+        return get_embeddings().embed_query(query)
+    except Exception as e:
+        logger.warning("Query embedding failed: %s", e)
+        metrics.incr("query_embedding_errors_total")
+        return None
+
+
+async def aquery_vector(query: str) -> Optional[List[float]]:
+    """Async query_vector"""
+    if not (PRE_ROUTER_ENABLED and PRE_ROUTER_CENTROIDS):
+        return None
+    try:
+        async with limit("gemini_embed"):
+            return await get_embeddings().aembed_query(query)
+    except Exception as e:
+        logger.warning("Query embedding failed: %s", e)
+        metrics.incr("query_embedding_errors_total")
+        return None
+
+
+def router_node(state: AgentState) -> AgentState:
+    start = time.perf_counter()
+    query = state["query"]
+
+    # Keyword rules are instant; only when they don't decide is it worth
+    # starting retrieval speculatively. A strong BM25 match needs no
+    # embedding at all, so it skips the centroid stage too.
+    pre = pre_route(query)
+    speculative = None
+    if pre is None:
+        lexical = lexical_search(get_lexical_index(), query, RETRIEVER_K * 2)
+        vector = None if lexical.strong else query_vector(query)
+        if SPECULATIVE_RETRIEVAL:
+            speculative = speculative_executor.submit(retrieve, query, vector, lexical)
+        # Centroid classifier next; the LLM only when unsure
+        if not lexical.strong:
+            pre = pre_route(query, get_embeddings(), vector)
+
+    if pre:
+        route, source = pre.route, pre.source
+        metrics.incr("pre_router_hits_total", source=source)
+    else:
+        try:
+            route, source = llm_route(query), "llm"
+        except BaseException:
+            if speculative is not None:
+                speculative.cancel()
+                metrics.incr("speculative_retrieval_total", outcome="cancelled")
+            raise
+        metrics.incr("pre_router_misses_total")
+
+    metrics.incr("router_decisions_total", route=route, source=source)
+    metrics.observe("router_seconds", time.perf_counter() - start, source=source)
+
+    if speculative is None:
+        return {**state, "route": route, "prefetched": False}
+
+    if route != "rag":
+        speculative.cancel()
+        metrics.incr("speculative_retrieval_total", outcome="discarded")
+        return {**state, "route": route, "prefetched": False}
+
+    # Whatever retrieval time is left after routing is still on the
+    # critical path
+    wait_start = time.perf_counter()
+    try:
+        result = speculative.result()
+    except Exception as e:
+        logger.warning("Speculative retrieval failed: %s", e)
+        metrics.incr("speculative_retrieval_total", outcome="failed")
+        return {**state, "route": route, "prefetched": False}
+    metrics.observe("speculative_wait_seconds", time.perf_counter() - wait_start)
+    metrics.incr("speculative_retrieval_total", outcome="used")
+
+    return {**state, **result, "route": route, "prefetched": True}
+
+
+async def arouter_node(state: AgentState) -> AgentState:
+    start = time.perf_counter()
+    query = state["query"]
+
+    pre = await apre_route(query)
+    speculative = None
+    if pre is None:
+        lexical = lexical_search(get_lexical_index(), query, RETRIEVER_K * 2)
+        vector = None if lexical.strong else await aquery_vector(query)
+        if SPECULATIVE_RETRIEVAL:
+            speculative = asyncio.create_task(aretrieve(query, vector, lexical))
+        if not lexical.strong:
+            pre = await apre_route(query, get_embeddings(), vector)
+
+    if pre:
+        route, source = pre.route, pre.source
+        metrics.incr("pre_router_hits_total", source=source)
+    else:
+        try:
+            route, source = await allm_route(query), "llm"
+        except BaseException:
+            if speculative is not None:
+                speculative.cancel()
+                metrics.incr("speculative_retrieval_total", outcome="cancelled")
+            raise
+        metrics.incr("pre_router_misses_total")
+
+    metrics.incr("router_decisions_total", route=route, source=source)
+    metrics.observe("router_seconds", time.perf_counter() - start, source=source)
+
+    if speculative is None:
+        return {**state, "route": route, "prefetched": False}
+
+    if route != "rag":
+        speculative.cancel()
+        metrics.incr("speculative_retrieval_total", outcome="discarded")
+        return {**state, "route": route, "prefetched": False}
+
+    wait_start = time.perf_counter()
+    try:
+        result = await speculative
+    except Exception as e:
+        logger.warning("Speculative retrieval failed: %s", e)
+        metrics.incr("speculative_retrieval_total", outcome="failed")
+        return {**state, "route": route, "prefetched": False}
+    metrics.observe("speculative_wait_seconds", time.perf_counter() - wait_start)
+    metrics.incr("speculative_retrieval_total", outcome="used")
+
+    return {**state, **result, "route": route, "prefetched": True}
+
+
+def node_timings() -> dict:
+    """Per-node latency stats plus speculative retrieval outcomes"""
+    snap = metrics.snapshot()
+    return {
+        k: v for section in snap.values() for k, v in section.items()
+        if k.startswith(("node_seconds", "speculative_"))
+    }
+
 
-    return {**state, "route": route}
+def pre_router_stats() -> dict:
+    """Pre-router hit rate and per-source routing latency"""
+    hits = sum(
+        metrics.counter_value("pre_router_hits_total", source=s)
+        for s in ("rules", "centroid")
+    )
+    misses = metrics.counter_value("pre_router_misses_total")
+    total = hits + misses
+    latencies = metrics.snapshot()["latencies"]
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / total if total else 0.0,
+        "latency": {
+            k: v for k, v in latencies.items() if k.startswith("router_seconds")
+        },
+    }
 
 # --------------------------------------------------
 # RETRIEVE NODE
 # --------------------------------------------------
+def retrieve(
+    query: str,
+    vector: Optional[List[float]] = None,
+    lexical: Optional[LexicalResult] = None,
+) -> dict:
+    """Answer-cache lookup, then BM25, then hybrid BM25 + vector search.
+
+    ``vector`` and ``lexical`` are the query embedding and BM25 result
+    when the router already made them.
+    """
+    # Exact repeats are answered without embedding the query
+    cached = answer_cache.get(query)
+    if cached is not None:
+        return {"docs": [], "answer": cached, "cache_hit": True, "direct_answer": False, "category": ""}
+
+    # A clear keyword match is answered without embedding the query either
+    if lexical is None:
+        lexical = lexical_search(get_lexical_index(), query, RETRIEVER_K * 2)
+    if lexical.strong:
+        return retrieved(query, lexical.docs[:RETRIEVER_K], lexical.docs, lexical_strong=True)
+
+    if vector is None:
+        vector = get_embeddings().embed_query(query)
+    cached = answer_cache.get(query, vector)
+    if cached is not None:
+        return {"docs": [], "answer": cached, "cache_hit": True, "direct_answer": False, "category": ""}
+
+    category = get_shards().predict(vector)
+    hits = search(vector, category=category)
+    return retrieved(query, fuse(hits, lexical.docs, RETRIEVER_K), hits, category=category)
+
+
+async def aretrieve(
+    query: str,
+    vector: Optional[List[float]] = None,
+    lexical: Optional[LexicalResult] = None,
+) -> dict:
+    """Async retrieve; BM25 and FAISS searches are local and stay inline"""
+    cached = answer_cache.get(query)
+    if cached is not None:
+        return {"docs": [], "answer": cached, "cache_hit": True, "direct_answer": False, "category": ""}
+
+    if lexical is None:
+        lexical = lexical_search(get_lexical_index(), query, RETRIEVER_K * 2)
+    if lexical.strong:
+        return retrieved(query, lexical.docs[:RETRIEVER_K], lexical.docs, lexical_strong=True)
+
+    if vector is None:
+        async with limit("gemini_embed"):
+            vector = await get_embeddings().aembed_query(query)
+    cached = answer_cache.get(query, vector)
+    if cached is not None:
+        return {"docs": [], "answer": cached, "cache_hit": True, "direct_answer": False, "category": ""}
+
+    category = get_shards().predict(vector)
+    hits = search(vector, category=category)
+    return retrieved(query, fuse(hits, lexical.docs, RETRIEVER_K), hits, category=category)
+
+
+def retrieved(
+    query: str,
+    docs: List[Document],
+    hits: List[Document],
+    lexical_strong: bool = False,
+    category: Optional[str] = None,
+) -> dict:
+    """State update for the retrieved ``docs``.
+
+    ``hits`` is the ranked list the direct-answer policy judges (vector
+    hits with similarities, or BM25 hits on the fast path); when it
+    accepts the top hit its FAQ answer is returned verbatim.
+    """
+    answer = direct_answer(query, hits, lexical_strong)
+    update = {"cache_hit": False, "category": category or ""}
+    if answer is not None:
+        return {**update, "docs": hits[:1], "answer": answer, "direct_answer": True}
+    return {**update, "docs": docs, "direct_answer": False}
+
+
+def search(vector: List[float], k: int = RETRIEVER_K * 2, category: Optional[str] = None) -> List[Document]:
+    """FAISS search; each hit is a copy carrying its cosine similarity.
+
+    With a ``category`` only that category's shard is searched
+    (agents/shards.py); without one, the global index.
+    """
+    store = get_shards().get(category) if category else get_vectorstore()
+    metrics.incr("vector_search_total", index=category or "global")
+    hits = store.similarity_search_with_score_by_vector(vector, k=k)
+    # Vectors are unit length, so squared L2 distance d = 2 - 2 * cos.
+    # "score" is re-scaled by fusion; "similarity" keeps the cosine.
+    docs = []
+    for doc, dist in hits:
+        similarity = 1.0 - float(dist) / 2
+        docs.append(Document(
+            page_content=doc.page_content,
+            metadata={**doc.metadata, "score": similarity, "similarity": similarity},
+        ))
+    return docs
+
+
 def retrieve_node(state: AgentState) -> AgentState:
-    docs = retriever.invoke(state["query"])
-    return {**state, "docs": docs}
+    if state.get("prefetched"):
+        return state
+    return {**state, **retrieve(state["query"])}
+
+
+async def aretrieve_node(state: AgentState) -> AgentState:
+    if state.get("prefetched"):
+        return state
+    return {**state, **await aretrieve(state["query"])}
 
 # --------------------------------------------------
 # ANSWER NODE — STRICT RAG (NO HALLUCINATION)
@@ -112,26 +412,48 @@ User question:
 Answer:
 """
 
-def answer_node(state: AgentState) -> AgentState:
-    if not state.get("docs"):
-        return {
-            **state,
-            "answer": "This information is not available in our help content."
-        }
+NO_DOCS_ANSWER = "This information is not available in our help content."
+
 
+def answer_prompt(state: AgentState) -> str:
+    # Fusion already dropped duplicate chunks, and the scraper merges
+    # paragraphs under one heading, so the chunks go in as they are
     context = "\n\n".join(doc.page_content for doc in state["docs"])
+    return ANSWER_PROMPT.format(
+        context=context,
+        question=state["query"]
+    )
+
 
-    # Use streaming for token-by-token generation
+def answer_node(state: AgentState) -> AgentState:
+    if not state.get("docs"):
+        return {**state, "answer": NO_DOCS_ANSWER}
+
+    # Tokens reach the UI as they arrive through the graph's "messages"
+    # stream mode; here they are only collected for the final state.
     full_answer = ""
-    for chunk in llm.stream(
-        ANSWER_PROMPT.format(
-            context=context,
-            question=state["query"]
-        )
-    ):
+    for chunk in get_llm().stream(answer_prompt(state)):
         full_answer += chunk.content
 
-    return {**state, "answer": full_answer.strip()}
+    answer = full_answer.strip()
+    answer_cache.put(state["query"], answer, state["docs"])
+
+    return {**state, "answer": answer}
+
+
+async def aanswer_node(state: AgentState) -> AgentState:
+    if not state.get("docs"):
+        return {**state, "answer": NO_DOCS_ANSWER}
+
+    full_answer = ""
+    async with limit("gemini_llm"):
+        async for chunk in get_llm().astream(answer_prompt(state)):
+            full_answer += chunk.content
+
+    answer = full_answer.strip()
+    answer_cache.put(state["query"], answer, state["docs"])
+
+    return {**state, "answer": answer}
 
 # --------------------------------------------------
 # CONTACT NODE
@@ -158,56 +480,77 @@ def booking_node(state: AgentState) -> AgentState:
         
         calendar = get_calendar_service()
         slots = calendar.get_available_slots(days_ahead=7)
-        
-        if slots:
-            slots_text = "\n".join([
-                f"**{i+1}.** {slot['display']}" 
-                for i, slot in enumerate(slots[:5])
-            ])
-            
-            answer = (
-                "I'd be happy to help you book a meeting! 📅\n\n"
-                "Here are the next available time slots:\n\n"
-                f"{slots_text}\n\n"
-                "**Please reply with the number (1-5) of your preferred slot**, "
-                "and I'll schedule the meeting for you."
-            )
+        return booking_answer(state, slots)
             
-            return {
-                **state,
-                "answer": answer,
-                "booking_slots": slots[:5]
-            }
-        else:
-            return {
-                **state,
-                "answer": (
-                    "I'd like to help you book a meeting, but I'm having trouble "
-                    "accessing the calendar right now. Please contact us directly:\n\n"
-                    "📧 Email: support@jashanmal.com\n"
-                    "📞 Call: 800 562 63"
-                )
-            }
+    except Exception as e:
+        logger.warning("Booking failed: %s", e)
+        metrics.incr("booking_errors_total")
+        return booking_error_answer(state)
+
+
+async def abooking_node(state: AgentState) -> AgentState:
+    """Async booking node; the Google Calendar client is blocking, so it
+    runs in the default executor."""
+    try:
+        from booking.calendar_service import get_calendar_service
+        
+        calendar = await run_blocking("calendar", get_calendar_service)
+        slots = await run_blocking("calendar", calendar.get_available_slots, days_ahead=7)
+        return booking_answer(state, slots)
             
     except Exception as e:
-        print(f"Booking error: {e}")
+        logger.warning("Booking failed: %s", e)
+        metrics.incr("booking_errors_total")
+        return booking_error_answer(state)
+
+
+def booking_answer(state: AgentState, slots: List[dict]) -> AgentState:
+    if slots:
+        slots_text = "\n".join([
+            f"**{i+1}.** {slot['display']}" 
+            for i, slot in enumerate(slots[:5])
+        ])
+        
+        answer = (
+            "I'd be happy to help you book a meeting! 📅\n\n"
+            "Here are the next available time slots:\n\n"
+            f"{slots_text}\n\n"
+            "**Please reply with the number (1-5) of your preferred slot**, "
+            "and I'll schedule the meeting for you."
+        )
+        
+        return {
+            **state,
+            "answer": answer,
+            "booking_slots": slots[:5]
+        }
+    else:
         return {
             **state,
             "answer": (
-                "I can help with booking requests. "
-                "Please share your preferred date and time, or contact us at:\n\n"
+                "I'd like to help you book a meeting, but I'm having trouble "
+                "accessing the calendar right now. Please contact us directly:\n\n"
                 "📧 Email: support@jashanmal.com\n"
                 "📞 Call: 800 562 63"
             )
         }
 
+
+def booking_error_answer(state: AgentState) -> AgentState:
+    return {
+        **state,
+        "answer": (
+            "I can help with booking requests. "
+            "Please share your preferred date and time, or contact us at:\n\n"
+            "📧 Email: support@jashanmal.com\n"
+            "📞 Call: 800 562 63"
+        )
+    }
+
 # --------------------------------------------------
 # GREETING NODE
 # --------------------------------------------------
-def greeting_node(state: AgentState) -> AgentState:
-    """Handle greetings and casual messages naturally"""
-    
-    GREETING_PROMPT = """
+GREETING_PROMPT = """
 You are a friendly customer support assistant for Jashanmal.
 
 The user said: "{query}"
@@ -227,23 +570,39 @@ User: "hi" → "Hi there! 👋 How can I help you today?"
 User: "thanks" → "You're welcome! 😊 Let me know if you need anything else."
 User: "ok" → "Great! Is there anything else I can help you with?"
 """
-    
-    response = llm.invoke(
+
+
+def greeting_node(state: AgentState) -> AgentState:
+    """Handle greetings and casual messages naturally"""
+    full_answer = ""
+    for chunk in get_llm().stream(
         GREETING_PROMPT.format(query=state['query'])
-    )
+    ):
+        full_answer += chunk.content
     
     return {
         **state,
-        "answer": response.content.strip()
+        "answer": full_answer.strip()
+    }
+
+
+async def agreeting_node(state: AgentState) -> AgentState:
+    full_answer = ""
+    async with limit("gemini_llm"):
+        async for chunk in get_llm().astream(
+            GREETING_PROMPT.format(query=state['query'])
+        ):
+            full_answer += chunk.content
+    
+    return {
+        **state,
+        "answer": full_answer.strip()
     }
 
 # --------------------------------------------------
 # FALLBACK NODE
 # --------------------------------------------------
-def fallback_node(state: AgentState) -> AgentState:
-    """Handle off-topic queries with a friendly redirect"""
-    
-    FALLBACK_PROMPT = """
+FALLBACK_PROMPT = """
 You are a friendly customer support assistant for Jashanmal.
 
 The user asked: "{query}"
@@ -255,28 +614,61 @@ Respond warmly but redirect them to what you CAN help with. Keep it brief and na
 Example:
 User: "What's the weather?" → "I'm focused on helping with Jashanmal customer support, so I can't help with weather info. But I'd be happy to help with your orders, shipping questions, or booking a support call! What can I assist you with?"
 """
-    
-    response = llm.invoke(
+
+
+def fallback_node(state: AgentState) -> AgentState:
+    """Handle off-topic queries with a friendly redirect"""
+    full_answer = ""
+    for chunk in get_llm().stream(
         FALLBACK_PROMPT.format(query=state['query'])
-    )
+    ):
+        full_answer += chunk.content
     
     return {
         **state,
-        "answer": response.content.strip()
+        "answer": full_answer.strip()
+    }
+
+
+async def afallback_node(state: AgentState) -> AgentState:
+    full_answer = ""
+    async with limit("gemini_llm"):
+        async for chunk in get_llm().astream(
+            FALLBACK_PROMPT.format(query=state['query'])
+        ):
+            full_answer += chunk.content
+    
+    return {
+        **state,
+        "answer": full_answer.strip()
     }
 
 # --------------------------------------------------
 # LANGGRAPH
 # --------------------------------------------------
+# Nodes whose LLM tokens are shown to the user while they are generated
+# (the router's one-word output is not)
+STREAMING_NODES = {"answer", "greeting", "fallback"}
+
 graph = StateGraph(AgentState)
 
-graph.add_node("router", router_node)
-graph.add_node("retrieve", retrieve_node)
-graph.add_node("answer", answer_node)
-graph.add_node("contact", contact_node)
-graph.add_node("booking", booking_node)
-graph.add_node("greeting", greeting_node)
-graph.add_node("fallback", fallback_node)
+def node(name, func, afunc=None):
+    """Instrumented node with sync and (optionally) async implementations, so the
+    graph can be driven by both ``agent.stream`` and ``agent.astream``."""
+    return RunnableLambda(
+        metrics.instrument(name)(func),
+        afunc=metrics.instrument(name)(afunc) if afunc else None,
+        name=name,
+    )
+
+
+graph.add_node("router", node("router", router_node, arouter_node))
+graph.add_node("retrieve", node("retrieve", retrieve_node, aretrieve_node))
+graph.add_node("answer", node("answer", answer_node, aanswer_node))
+graph.add_node("contact", node("contact", contact_node))
+graph.add_node("booking", node("booking", booking_node, abooking_node))
+graph.add_node("greeting", node("greeting", greeting_node, agreeting_node))
+graph.add_node("fallback", node("fallback", fallback_node, afallback_node))
 
 graph.set_entry_point("router")
 
@@ -292,7 +684,16 @@ graph.add_conditional_edges(
     },
 )
 
-graph.add_edge("retrieve", "answer")
+# Cached and direct FAQ answers skip the answer LLM
+graph.add_conditional_edges(
+    "retrieve",
+    lambda s: "hit" if s.get("cache_hit") or s.get("direct_answer") else "miss",
+    {
+        "hit": END,
+        "miss": "answer",
+    },
+)
+
 graph.add_edge("answer", END)
 graph.add_edge("contact", END)
 graph.add_edge("booking", END)
@@ -300,8 +701,73 @@ graph.add_edge("greeting", END)
 graph.add_edge("fallback", END)
 
 # --------------------------------------------------
-# CHECKPOINTER (SESSION MEMORY READY)
+# CHECKPOINTER (SQLITE, SEE db/database.py)
 # --------------------------------------------------
-checkpointer = MemorySaver()
+checkpointer = SQLiteCheckpointer()
+
+# One checkpoint thread per browser session, evicted when idle
+sessions = SessionRegistry(checkpointer)
 
 agent = graph.compile(checkpointer=checkpointer)
+
+
+async def astream(
+    query: str,
+    thread_id: str,
+    stream_mode=("updates", "messages"),
+) -> AsyncIterator[tuple]:
+    """Async entry point: yields ``(mode, chunk)`` pairs for one turn.
+
+    All nodes run their async versions, so many conversations can share
+    one event loop; upstream calls are capped by ``agents.concurrency``.
+    """
+    start = time.perf_counter()
+    try:
+        with profile_if_slow(f"turn-{thread_id}"):
+            async for item in agent.astream(
+                {"query": query},
+                config={"configurable": {"thread_id": thread_id}},
+                stream_mode=list(stream_mode),
+            ):
+                yield item
+    except Exception as e:
+        metrics.incr("request_errors_total", error=type(e).__name__)
+        raise
+    finally:
+        # Failed and abandoned turns count towards latency too
+        metrics.observe("request_seconds", time.perf_counter() - start)
+        # The turn's checkpoints are durable once it ends
+        await asyncio.to_thread(checkpointer.flush)
+
+
+# --------------------------------------------------
+# WARM-UP
+# --------------------------------------------------
+def warm_up() -> dict:
+    """Build every shared resource before traffic arrives.
+
+    Loads the FAISS index and its shard manifest, creates the Gemini
+    clients, fits the pre-router centroids and opens the checkpoint
+    database. Returns seconds per step.
+    """
+    timings = {}
+
+    def step(name, fn):
+        start = time.perf_counter()
+        fn()
+        timings[name] = time.perf_counter() - start
+
+    step("llm", get_llm)
+    step("vectorstore", get_vectorstore)
+    step("shards", get_shards)
+    step("lexical_index", get_lexical_index)
+    if PRE_ROUTER_ENABLED and PRE_ROUTER_CENTROIDS:
+        step("pre_router", lambda: get_classifier(get_embeddings()).fit())
+    step("checkpointer", lambda: checkpointer.conn)
+
+    # Resources built earlier (or by this call) report their build time
+    timings.update(init_timings())
+    for name, seconds in timings.items():
+        metrics.observe("warm_up_seconds", seconds, step=name)
+    logger.info("Warm-up: %s", ", ".join(f"{k} {v * 1000:.0f} ms" for k, v in timings.items()))
+    return timings
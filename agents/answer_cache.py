@@ -0,0 +1,225 @@
+"""Answer cache for the RAG path.
+
+Final answers are stored against the normalized query text together with
+the ``content_hash`` of every document that went into them, and a repeat
+of the query is served straight from the cache. With
+ANSWER_CACHE_SEMANTIC=1 the query embedding is stored too, and a later
+query whose embedding is close enough (cosine similarity) is also served.
+That is off by default: distinct FAQs reach 0.95 cosine on Gemini, so the
+threshold must be checked on labelled query pairs first.
+
+Entries are dropped when they expire (TTL), when the cache is full (LRU),
+or when the served FAISS index is replaced and one of their documents is
+no longer in it.
+"""
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+sys.path.append(str(Path(__file__).parent.parent / "ingestion"))
+
+from index_store import iter_indexed
+
+from agents import metrics
+
+# --------------------------------------------------
+# CONFIG
+# --------------------------------------------------
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "1") == "1"
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "512"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400"))
+# Embedding matches; off until ANSWER_CACHE_THRESHOLD is validated
+ANSWER_CACHE_SEMANTIC = os.getenv("ANSWER_CACHE_SEMANTIC", "0") == "1"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace"""
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _served_index():
+    from agents.resources import get_vectorstore
+
+    return get_vectorstore()
+
+
+class _Entry:
+    __slots__ = ("query", "vector", "answer", "hashes", "created")
+
+    def __init__(self, query, vector, answer, hashes):
+        self.query = query
+        self.vector = vector  # None for entries only matched exactly
+        self.answer = answer
+        self.hashes = hashes
+        self.created = time.time()
+
+
+class SemanticAnswerCache:
+    """LRU + TTL cache of RAG answers keyed on the query (and its embedding)"""
+
+    def __init__(
+        self,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = ANSWER_CACHE_TTL_SECONDS,
+        threshold: float = ANSWER_CACHE_THRESHOLD,
+        semantic: bool = ANSWER_CACHE_SEMANTIC,
+        index: Callable = _served_index,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self.semantic = semantic
+        self.index = index  # returns the FAISS index answers are built from
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None  # stacked entry vectors
+        self._matrix_keys: List[str] = []
+        # Vectors of recent misses, so put() does not need to re-embed
+        self._pending: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.RLock()
+
+        self._served = None
+        self._valid_hashes: frozenset = frozenset()
+
+    # ---------------- invalidation ----------------
+    def _refresh_hashes(self):
+        """Re-read the document hashes when the served index was replaced
+        and drop entries built from documents it no longer has"""
+        served = self.index()
+        if served is self._served:
+            return
+
+        self._valid_hashes = frozenset(
+            doc.metadata["content_hash"]
+            for _, _, doc in iter_indexed(served)
+            if "content_hash" in doc.metadata
+        )
+        stale = [
+            key for key, entry in self._entries.items()
+            if not entry.hashes <= self._valid_hashes
+        ]
+        for key in stale:
+            del self._entries[key]
+        if stale:
+            self._matrix = None
+            metrics.incr("answer_cache_invalidations_total", len(stale))
+        self._served = served
+
+    # ---------------- eviction ----------------
+    def _expired(self, entry: _Entry) -> bool:
+        return time.time() - entry.created > self.ttl_seconds
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._matrix = None
+            metrics.incr("answer_cache_evictions_total")
+
+    def _semantic_match(self, vector: np.ndarray) -> Optional[str]:
+        if self._matrix is None:
+            self._matrix_keys = [k for k, e in self._entries.items() if e.vector is not None]
+            self._matrix = (
+                np.vstack([self._entries[k].vector for k in self._matrix_keys])
+                if self._matrix_keys else np.empty((0, len(vector)), dtype=np.float32)
+            )
+        if not self._matrix_keys:
+            return None
+        sims = self._matrix @ vector
+        best = int(np.argmax(sims))
+        if sims[best] >= self.threshold:
+            return self._matrix_keys[best]
+        return None
+
+    # ---------------- public API ----------------
+    def get(self, query: str, vector: Optional[List[float]] = None) -> Optional[str]:
+        """Cached answer for the query, or None.
+
+        The normalized query text is checked first (no embedding needed);
+        the embedding is only compared when ``vector`` is given and
+        semantic matching is on.
+        """
+        key = normalize_query(query)
+        with self._lock:
+            if self._entries:
+                self._refresh_hashes()
+
+            match = key if key in self._entries else None
+            kind = "exact"
+            if match is None and vector is not None and self.semantic:
+                vec = np.asarray(vector, dtype=np.float32)
+                vec = vec / np.linalg.norm(vec)
+                match = self._semantic_match(vec)
+                kind = "semantic"
+                if match is None:
+                    self._pending[key] = vec
+                    while len(self._pending) > 64:
+                        self._pending.popitem(last=False)
+
+            if match is not None:
+                entry = self._entries[match]
+                if self._expired(entry):
+                    del self._entries[match]
+                    self._matrix = None
+                    metrics.incr("answer_cache_expired_total")
+                else:
+                    self._entries.move_to_end(match)
+                    metrics.incr("answer_cache_hits_total", kind=kind)
+                    return entry.answer
+
+            if vector is not None:
+                metrics.incr("answer_cache_misses_total")
+            return None
+
+    def put(self, query: str, answer: str, docs: List[Document]):
+        """Store an answer generated from ``docs`` for the query"""
+        key = normalize_query(query)
+        with self._lock:
+            vec = self._pending.pop(key, None)
+            if not docs or self.max_entries <= 0:
+                return
+            self._refresh_hashes()
+            hashes = [d.metadata.get("content_hash") for d in docs]
+            # Only answers we can invalidate later are cached
+            if not all(hashes):
+                return
+
+            self._entries[key] = _Entry(key, vec, answer, frozenset(hashes))
+            self._entries.move_to_end(key)
+            self._matrix = None
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+            self._matrix = None
+
+    def stats(self) -> dict:
+        hits = sum(
+            metrics.counter_value("answer_cache_hits_total", kind=k)
+            for k in ("exact", "semantic")
+        )
+        misses = metrics.counter_value("answer_cache_misses_total")
+        return {
+            "entries": len(self._entries),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "evictions": metrics.counter_value("answer_cache_evictions_total"),
+            "invalidations": metrics.counter_value("answer_cache_invalidations_total"),
+        }
+
+
+answer_cache = SemanticAnswerCache(
+    max_entries=ANSWER_CACHE_MAX_ENTRIES if ANSWER_CACHE_ENABLED else 0,
+)
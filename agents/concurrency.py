@@ -0,0 +1,33 @@
+"""Per-upstream concurrency limits for the async agent"""
+import asyncio
+import functools
+import os
+import weakref
+
+# Max in-flight calls per upstream API, across all conversations in the
+# process
+LIMITS = {
+    "gemini_llm": int(os.getenv("GEMINI_LLM_CONCURRENCY", "16")),
+    "gemini_embed": int(os.getenv("GEMINI_EMBED_CONCURRENCY", "32")),
+    "calendar": int(os.getenv("CALENDAR_CONCURRENCY", "4")),
+}
+
+# Semaphores belong to one event loop, so keep a set per loop
+_semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def limit(upstream: str) -> asyncio.Semaphore:
+    """Semaphore guarding calls to ``upstream`` on the running loop"""
+    loop = asyncio.get_running_loop()
+    per_loop = _semaphores.setdefault(loop, {})
+    sem = per_loop.get(upstream)
+    if sem is None:
+        sem = per_loop[upstream] = asyncio.Semaphore(LIMITS[upstream])
+    return sem
+
+
+async def run_blocking(upstream: str, fn, *args, **kwargs):
+    """Run a blocking call in the default executor under the upstream limit"""
+    async with limit(upstream):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(fn, *args, **kwargs))
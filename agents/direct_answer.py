@@ -0,0 +1,85 @@
+"""Verbatim FAQ answers for queries that clearly match one heading.
+
+When the best retrieved document is a Q&A record whose heading the query
+all but repeats, the record's answer is returned as it is and the answer
+LLM call is skipped. A hit must:
+
+1. clear a confidence bar: cosine similarity of at least
+   DIRECT_ANSWER_MIN_SIMILARITY for vector hits, or a strong BM25 match
+   (see hybrid.py) for the lexical fast path;
+2. beat the best document under any *other* heading by
+   DIRECT_ANSWER_MARGIN (vector hits; strong BM25 matches already beat
+   the runner-up by LEXICAL_MARGIN);
+3. share at least DIRECT_ANSWER_MIN_OVERLAP of its terms with the heading
+   (Jaccard over BM25 tokens), so paraphrases that only look similar in
+   embedding space still go to the LLM.
+"""
+import os
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from langchain_core.documents import Document
+
+sys.path.append(str(Path(__file__).parent.parent / "ingestion"))
+
+from bm25 import tokenize
+from records import split_record_text
+
+from agents import metrics
+
+# --------------------------------------------------
+# CONFIG
+# --------------------------------------------------
+DIRECT_ANSWER_ENABLED = os.getenv("DIRECT_ANSWER_ENABLED", "1") == "1"
+DIRECT_ANSWER_MIN_SIMILARITY = float(os.getenv("DIRECT_ANSWER_MIN_SIMILARITY", "0.85"))
+DIRECT_ANSWER_MARGIN = float(os.getenv("DIRECT_ANSWER_MARGIN", "0.05"))
+DIRECT_ANSWER_MIN_OVERLAP = float(os.getenv("DIRECT_ANSWER_MIN_OVERLAP", "0.6"))
+
+
+def heading_overlap(query: str, heading: str) -> float:
+    q, h = set(tokenize(query)), set(tokenize(heading))
+    if not q or not h:
+        return 0.0
+    return len(q & h) / len(q | h)
+
+
+def direct_answer(query: str, docs: List[Document], lexical_strong: bool = False) -> Optional[str]:
+    """The top document's verbatim answer if the policy accepts it.
+
+    ``docs`` are best first; vector hits carry their cosine similarity in
+    ``metadata["similarity"]``. ``lexical_strong`` marks BM25 fast-path
+    results, which have no similarity.
+    """
+    if not DIRECT_ANSWER_ENABLED or not docs:
+        return None
+
+    top = split_record_text(docs[0].page_content)
+    if top is None:
+        metrics.incr("direct_answer_total", result="not_faq")
+        return None
+    heading, answer = top
+
+    if not lexical_strong:
+        similarity = docs[0].metadata.get("similarity", 0.0)
+        runner_up = max(
+            (
+                d.metadata.get("similarity", 0.0)
+                for d in docs[1:]
+                if (split_record_text(d.page_content) or ("",))[0] != heading
+            ),
+            default=0.0,
+        )
+        if similarity < DIRECT_ANSWER_MIN_SIMILARITY:
+            metrics.incr("direct_answer_total", result="low_similarity")
+            return None
+        if similarity - runner_up < DIRECT_ANSWER_MARGIN:
+            metrics.incr("direct_answer_total", result="ambiguous")
+            return None
+
+    if heading_overlap(query, heading) < DIRECT_ANSWER_MIN_OVERLAP:
+        metrics.incr("direct_answer_total", result="low_overlap")
+        return None
+
+    metrics.incr("direct_answer_total", result="hit")
+    return answer
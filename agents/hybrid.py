@@ -0,0 +1,99 @@
+"""Hybrid lexical + vector retrieval.
+
+1. BM25 over the FAQ documents runs locally, before any embedding call.
+   When the best document clearly matches (it covers most of the query's
+   IDF-weighted terms and beats the runner-up by a margin) its results are
+   used as they are and the query is never embedded.
+2. Otherwise BM25 and FAISS results are combined with reciprocal rank
+   fusion.
+
+Each returned document carries a ``score`` in [0, 1] relative to the best
+hit, which is what the context packer ranks on.
+"""
+import os
+import sys
+from pathlib import Path
+from typing import List, NamedTuple
+
+from langchain_core.documents import Document
+
+sys.path.append(str(Path(__file__).parent.parent / "ingestion"))
+
+from bm25 import reciprocal_rank_fusion
+
+from agents import metrics
+
+# --------------------------------------------------
+# CONFIG
+# --------------------------------------------------
+HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "1") == "1"
+LEXICAL_MIN_COVERAGE = float(os.getenv("LEXICAL_MIN_COVERAGE", "0.8"))
+LEXICAL_MARGIN = float(os.getenv("LEXICAL_MARGIN", "1.5"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+
+class LexicalResult(NamedTuple):
+    docs: List[Document]
+    strong: bool  # good enough to skip vector search
+
+
+def doc_key(doc: Document) -> str:
+    # The embedded record_text: BM25 and FAISS copies of a record share it
+    # even when the FAISS metadata predates content_hash
+    return doc.page_content
+
+
+def lexical_search(index, query: str, k: int) -> LexicalResult:
+    """BM25 top ``k`` and whether the best hit is a clear match"""
+    if not HYBRID_RETRIEVAL:
+        return LexicalResult([], False)
+
+    hits = index.search(query, k)
+    if not hits:
+        metrics.incr("lexical_search_total", result="empty")
+        return LexicalResult([], False)
+
+    top = hits[0][1]
+    docs = [
+        Document(
+            page_content=index.docs[i]["page_content"],
+            metadata={**index.docs[i]["metadata"], "score": score / top},
+        )
+        for i, score in hits
+    ]
+
+    second = hits[1][1] if len(hits) > 1 else 0.0
+    strong = (
+        index.coverage(query, hits[0][0]) >= LEXICAL_MIN_COVERAGE
+        and top >= LEXICAL_MARGIN * second
+    )
+    metrics.incr("lexical_search_total", result="strong" if strong else "weak")
+    return LexicalResult(docs, strong)
+
+
+def fuse(vector_docs: List[Document], lexical_docs: List[Document], k: int) -> List[Document]:
+    """Reciprocal rank fusion of the two result lists, best first"""
+    if not lexical_docs:
+        return vector_docs[:k]
+
+    by_key = {}
+    # Vector copies win on ties so their metadata is kept; the BM25 copy
+    # fills in what they lack (content_hash on older indexes)
+    for doc in lexical_docs + vector_docs:
+        key = doc_key(doc)
+        if key in by_key:
+            doc = Document(page_content=doc.page_content, metadata={**by_key[key].metadata, **doc.metadata})
+        by_key[key] = doc
+
+    fused = reciprocal_rank_fusion(
+        [[doc_key(d) for d in vector_docs], [doc_key(d) for d in lexical_docs]],
+        k=RRF_K,
+    )[:k]
+    top = fused[0][1]
+    return [
+        Document(
+            page_content=by_key[key].page_content,
+            metadata={**by_key[key].metadata, "score": score / top},
+        )
+        for key, score in fused
+    ]
@@ -0,0 +1,302 @@
+"""In-process metrics for the agent.
+
+- counters and latency histograms (``incr`` / ``observe``)
+- ``instrument`` wraps a graph node and records its duration, errors and
+  the route it chose
+- ``UsageCallback`` attributes LLM prompt/completion tokens to the node
+  that made the call
+- export as Prometheus text (``render_prometheus`` / ``start_metrics_server``)
+  and/or one JSON line per event (``METRICS_JSONL``)
+"""
+import bisect
+import functools
+import inspect
+import json
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# --------------------------------------------------
+# CONFIG
+# --------------------------------------------------
+# Append one JSON object per node run / LLM call to this file
+METRICS_JSONL = os.getenv("METRICS_JSONL", "")
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+INF_LABEL = 'le="+Inf"'
+
+_lock = threading.Lock()
+
+# (name, labels) -> value
+_counters: Dict[Tuple[str, tuple], float] = defaultdict(float)
+
+# (name, labels) -> [count, total_seconds, max_seconds, bucket_counts]
+_latencies: Dict[Tuple[str, tuple], list] = {}
+
+
+def _key(name: str, labels: dict) -> Tuple[str, tuple]:
+    return name, tuple(sorted(labels.items()))
+
+
+def incr(name: str, value: float = 1, **labels):
+    """Increment a counter"""
+    with _lock:
+        _counters[_key(name, labels)] += value
+
+
+def observe(name: str, seconds: float, **labels):
+    """Record one latency observation"""
+    key = _key(name, labels)
+    bucket = bisect.bisect_left(BUCKETS, seconds)
+    with _lock:
+        stats = _latencies.get(key)
+        if stats is None:
+            stats = _latencies[key] = [0, 0.0, 0.0, [0] * (len(BUCKETS) + 1)]
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] = max(stats[2], seconds)
+        stats[3][bucket] += 1
+
+
+def counter_value(name: str, **labels) -> float:
+    """Current value of a counter (0 if never incremented)"""
+    with _lock:
+        return _counters.get(_key(name, labels), 0)
+
+
+def snapshot() -> dict:
+    """Copy of all counters and latency stats, keyed by readable names"""
+    def fmt(name, labels):
+        if not labels:
+            return name
+        return name + "{" + ",".join(f"{k}={v}" for k, v in labels) + "}"
+
+    with _lock:
+        counters = {fmt(n, l): v for (n, l), v in _counters.items()}
+        latencies = {
+            fmt(n, l): {
+                "count": c,
+                "avg_ms": round(total / c * 1000, 3),
+                "max_ms": round(mx * 1000, 3),
+            }
+            for (n, l), (c, total, mx, _) in _latencies.items()
+        }
+    return {"counters": counters, "latencies": latencies}
+
+
+def reset():
+    """Clear all recorded metrics"""
+    with _lock:
+        _counters.clear()
+        _latencies.clear()
+
+
+# --------------------------------------------------
+# JSONL EVENTS
+# --------------------------------------------------
+_events: "queue.SimpleQueue" = queue.SimpleQueue()
+_writer: Optional[threading.Thread] = None
+
+
+def _write_events(path: str):
+    with open(path, "a", encoding="utf-8") as f:
+        while True:
+            f.write(json.dumps(_events.get(), ensure_ascii=False) + "\n")
+            # Flush once the queue is drained rather than per event
+            if _events.empty():
+                f.flush()
+
+
+def emit(event: dict):
+    """Queue an event for the JSONL sink (no-op unless METRICS_JSONL is set)"""
+    global _writer
+    if not METRICS_JSONL:
+        return
+    if _writer is None:
+        with _lock:
+            if _writer is None:
+                _writer = threading.Thread(
+                    target=_write_events, args=(METRICS_JSONL,),
+                    name="metrics-jsonl", daemon=True,
+                )
+                _writer.start()
+    _events.put({"ts": time.time(), **event})
+
+
+# --------------------------------------------------
+# NODE INSTRUMENTATION
+# --------------------------------------------------
+def _record(node: str, start: float, result, error: Optional[BaseException]):
+    seconds = time.perf_counter() - start
+    observe("node_seconds", seconds, node=node)
+    incr("node_runs_total", node=node)
+
+    route = result.get("route") if node == "router" and isinstance(result, dict) else None
+    if route:
+        incr("route_total", route=route)
+    if error is not None:
+        incr("node_errors_total", node=node, error=type(error).__name__)
+
+    emit({
+        "event": "node",
+        "node": node,
+        "duration_ms": round(seconds * 1000, 3),
+        "route": route,
+        "error": repr(error) if error is not None else None,
+    })
+
+
+def instrument(node: str):
+    """Decorator recording duration, route and errors of a graph node"""
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                result, error = None, None
+                try:
+                    result = await fn(*args, **kwargs)
+                    return result
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    _record(node, start, result, error)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result, error = None, None
+            try:
+                result = fn(*args, **kwargs)
+                return result
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                _record(node, start, result, error)
+        return wrapper
+    return decorator
+
+
+class UsageCallback(BaseCallbackHandler):
+    """Counts LLM calls, latency and tokens per graph node.
+
+    LangGraph puts the node name into the run metadata, which is only
+    passed at start, so it is remembered per run_id until the call ends.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self._runs: Dict = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node", "none")
+        self._runs[run_id] = (node, time.perf_counter())
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        node, start = self._runs.pop(run_id, ("none", None))
+        if start is not None:
+            observe("llm_seconds", time.perf_counter() - start, node=node)
+        incr("llm_calls_total", node=node)
+
+        usage = {}
+        for generations in response.generations:
+            for gen in generations:
+                message = getattr(gen, "message", None)
+                if getattr(message, "usage_metadata", None):
+                    usage = message.usage_metadata
+        prompt = usage.get("input_tokens", 0)
+        completion = usage.get("output_tokens", 0)
+        incr("llm_tokens_total", prompt, node=node, kind="prompt")
+        incr("llm_tokens_total", completion, node=node, kind="completion")
+
+        emit({
+            "event": "llm",
+            "node": node,
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+        })
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        node, _ = self._runs.pop(run_id, ("none", None))
+        incr("llm_errors_total", node=node, error=type(error).__name__)
+
+
+usage_callback = UsageCallback()
+
+
+# --------------------------------------------------
+# PROMETHEUS EXPORT
+# --------------------------------------------------
+def _labels(labels: tuple, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    with _lock:
+        counters = sorted(_counters.items())
+        latencies = sorted(
+            (key, (c, total, list(buckets)))
+            for key, (c, total, _, buckets) in _latencies.items()
+        )
+
+    lines = []
+    seen = set()
+    for (name, labels), value in counters:
+        if name not in seen:
+            lines.append(f"# TYPE {name} counter")
+            seen.add(name)
+        lines.append(f"{name}{_labels(labels)} {value:g}")
+
+    for (name, labels), (count, total, buckets) in latencies:
+        if name not in seen:
+            lines.append(f"# TYPE {name} histogram")
+            seen.add(name)
+        cumulative = 0
+        for bound, n in zip(BUCKETS, buckets):
+            cumulative += n
+            le = f'le="{bound:g}"'
+            lines.append(f"{name}_bucket{_labels(labels, le)} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(labels, INF_LABEL)} {count}")
+        lines.append(f"{name}_sum{_labels(labels)} {total:.6f}")
+        lines.append(f"{name}_count{_labels(labels)} {count}")
+
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"✓ Metrics available at http://{host}:{port}/metrics")
+    return server
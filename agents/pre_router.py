@@ -0,0 +1,259 @@
+"""Local zero-LLM routing stage that runs before the Gemini router.
+
+Two classifiers are tried in order:
+
+1. Keyword / regex rules for the unambiguous cases ("hi", "thanks",
+   "what's your phone number", "book a call").
+2. A nearest-centroid classifier over embeddings of labelled example
+   queries, off-topic ones included so it can answer ``fallback``. Off
+   by default (PRE_ROUTER_CENTROIDS) until its thresholds are checked on
+   real query vectors: ``python -m benchmarks.routing_bench``.
+
+Each returns a route with a confidence score. Anything below the
+configured thresholds returns ``None`` so the caller can fall back to the
+LLM router.
+"""
+import asyncio
+import logging
+import os
+import re
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from agents import metrics
+from agents.concurrency import limit
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------
+# CONFIG
+# --------------------------------------------------
+PRE_ROUTER_ENABLED = os.getenv("PRE_ROUTER_ENABLED", "1") == "1"
+
+# Nearest-centroid stage; the keyword rules run whenever PRE_ROUTER_ENABLED
+PRE_ROUTER_CENTROIDS = os.getenv("PRE_ROUTER_CENTROIDS", "0") == "1"
+
+# Minimum cosine similarity to the best centroid
+CENTROID_THRESHOLD = float(os.getenv("PRE_ROUTER_CENTROID_THRESHOLD", "0.80"))
+
+# Minimum gap between best and second-best centroid
+CENTROID_MARGIN = float(os.getenv("PRE_ROUTER_CENTROID_MARGIN", "0.04"))
+
+
+class PreRoute(NamedTuple):
+    route: str
+    confidence: float
+    source: str  # "rules" or "centroid"
+
+
+# --------------------------------------------------
+# RULES
+# --------------------------------------------------
+_GREETING_RE = re.compile(
+    r"^(hi+|hello+|hey+|hiya|good (morning|afternoon|evening)|"
+    r"thanks?( you)?( so much| a lot)?|thank you( so much| very much)?|thx|ty|"
+    r"bye|goodbye|see you|ok(ay)?|yes|no|cool|great|perfect)"
+    r"( there)?[\s!.?😊🙂👋]*$",
+    re.IGNORECASE,
+)
+
+_CONTACT_RE = re.compile(
+    r"\b(phone number|contact (number|details|info|you|us|support)|"
+    r"customer (support|service|care)|whats ?app|e-?mail (address|id|you|support)|"
+    r"get in touch|reach (you|out|support)|talk to (a|an|someone|somebody|a human|an agent)|"
+    r"speak (to|with) (a|an|someone|somebody))\b",
+    re.IGNORECASE,
+)
+
+_BOOKING_RE = re.compile(
+    r"\b(book|schedule|arrange|set up|setup)\b.{0,30}\b(call|meeting|appointment|consultation|demo)\b",
+    re.IGNORECASE,
+)
+
+
+def classify_rules(query: str) -> Optional[PreRoute]:
+    """Match the query against the keyword rules"""
+    q = query.strip()
+    if not q:
+        return None
+
+    if _GREETING_RE.match(q):
+        return PreRoute("greeting", 0.99, "rules")
+    if _BOOKING_RE.search(q):
+        return PreRoute("booking", 0.95, "rules")
+    if _CONTACT_RE.search(q):
+        return PreRoute("contact", 0.9, "rules")
+    return None
+
+
+# --------------------------------------------------
+# NEAREST CENTROID
+# --------------------------------------------------
+LABELLED_EXAMPLES: Dict[str, List[str]] = {
+    "greeting": [
+        "hi",
+        "hello there",
+        "hey, good morning",
+        "thanks for your help",
+        "thank you so much",
+        "ok great",
+        "bye, have a nice day",
+    ],
+    "contact": [
+        "what is your phone number",
+        "how can I contact customer support",
+        "can I talk to someone from your team",
+        "what is your email address",
+        "do you have whatsapp support",
+        "how do I get in touch with you",
+        "what are your customer service hours",
+    ],
+    "booking": [
+        "I want to book a call",
+        "can I schedule a meeting with support",
+        "book an appointment for tomorrow",
+        "arrange a call with your team",
+        "I'd like to set up a meeting",
+        "are there any free slots for a call this week",
+    ],
+    "rag": [
+        "how do I track my order",
+        "can I cancel my order",
+        "what payment methods do you accept",
+        "do you offer cash on delivery",
+        "how long does shipping take",
+        "do you ship internationally",
+        "how do I return an item",
+        "can I exchange a product",
+        "how do I use my gift card",
+        "when will I get my refund",
+        "tell me about Jashanmal",
+        "my order is delayed",
+    ],
+    "fallback": [
+        "what's the weather like today",
+        "tell me a joke",
+        "who won the football match yesterday",
+        "write me a python function",
+        "what is the capital of France",
+        "can you recommend a good movie",
+        "how do I cook pasta",
+        "what's the meaning of life",
+    ],
+}
+
+
+class CentroidClassifier:
+    """Nearest-centroid classifier over example query embeddings"""
+
+    def __init__(self, embeddings, examples: Dict[str, List[str]] = LABELLED_EXAMPLES):
+        self.embeddings = embeddings
+        self.examples = examples
+        self.labels: List[str] = []
+        self.centroids: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def fit(self):
+        """Embed the labelled examples and compute one unit centroid per route"""
+        with self._lock:
+            if self.centroids is not None:
+                return
+            labels, centroids = [], []
+            for label, texts in self.examples.items():
+                # Queries are embedded as queries so they share a space
+                # with what classify() sees at runtime.
+                vecs = np.array(
+                    [self.embeddings.embed_query(t) for t in texts],
+                    dtype=np.float32,
+                )
+                vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+                centroid = vecs.mean(axis=0)
+                centroids.append(centroid / np.linalg.norm(centroid))
+                labels.append(label)
+            self.labels = labels
+            self.centroids = np.vstack(centroids)
+
+    def classify(self, query: str, vector: Optional[List[float]] = None) -> Optional[PreRoute]:
+        """Return the best route, or None if it is not clearly ahead.
+
+        Pass the query's ``vector`` when it is already embedded.
+        """
+        if self.centroids is None:
+            self.fit()
+        if vector is None:
+            vector = self.embeddings.embed_query(query)
+        return self._nearest(vector)
+
+    async def aclassify(self, query: str, vector: Optional[List[float]] = None) -> Optional[PreRoute]:
+        """Async classify; the one-off fit runs in a worker thread"""
+        if self.centroids is None:
+            await asyncio.to_thread(self.fit)
+        if vector is None:
+            async with limit("gemini_embed"):
+                vector = await self.embeddings.aembed_query(query)
+        return self._nearest(vector)
+
+    def _nearest(self, vector: List[float]) -> Optional[PreRoute]:
+        vec = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        if not norm:
+            return None
+        sims = self.centroids @ (vec / norm)
+
+        order = np.argsort(sims)[::-1]
+        best, second = float(sims[order[0]]), float(sims[order[1]])
+        if best < CENTROID_THRESHOLD or best - second < CENTROID_MARGIN:
+            return None
+        return PreRoute(self.labels[order[0]], best, "centroid")
+
+
+# --------------------------------------------------
+# ENTRY POINT
+# --------------------------------------------------
+_classifier: Optional[CentroidClassifier] = None
+_classifier_lock = threading.Lock()
+
+
+def get_classifier(embeddings) -> CentroidClassifier:
+    """Get or create the shared centroid classifier"""
+    global _classifier
+    with _classifier_lock:
+        if _classifier is None or _classifier.embeddings is not embeddings:
+            _classifier = CentroidClassifier(embeddings)
+        return _classifier
+
+
+def pre_route(query: str, embeddings=None, vector: Optional[List[float]] = None) -> Optional[PreRoute]:
+    """Classify a query locally; None means "ask the LLM router"."""
+    if not PRE_ROUTER_ENABLED:
+        return None
+
+    result = classify_rules(query)
+    if result or embeddings is None or not PRE_ROUTER_CENTROIDS:
+        return result
+
+    try:
+        return get_classifier(embeddings).classify(query, vector)
+    except Exception as e:
+        logger.warning("Pre-router centroid stage failed: %s", e)
+        metrics.incr("pre_router_errors_total")
+        return None
+
+
+async def apre_route(query: str, embeddings=None, vector: Optional[List[float]] = None) -> Optional[PreRoute]:
+    """Async pre_route"""
+    if not PRE_ROUTER_ENABLED:
+        return None
+
+    result = classify_rules(query)
+    if result or embeddings is None or not PRE_ROUTER_CENTROIDS:
+        return result
+
+    try:
+        return await get_classifier(embeddings).aclassify(query, vector)
+    except Exception as e:
+        logger.warning("Pre-router centroid stage failed: %s", e)
+        metrics.incr("pre_router_errors_total")
+        return None
@@ -0,0 +1,78 @@
+"""Opt-in sampling profiler for slow requests.
+
+While a request runs, a background thread samples the stack of the thread
+serving it every ``PROFILE_INTERVAL_MS``. If the request turns out slower
+than ``PROFILE_SLOW_MS``, the samples are written in collapsed-stack
+format (one ``frame;frame;frame count`` line per stack), which
+flamegraph.pl and speedscope read directly. Faster requests are
+discarded.
+
+Disabled unless PROFILE_SLOW_MS is set. PROFILE_SAMPLE_RATE profiles only
+a fraction of requests. With the async agent, every conversation shares
+the event loop thread, so samples can include other sessions' work.
+"""
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+# --------------------------------------------------
+# CONFIG
+# --------------------------------------------------
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "0"))
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "1.0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "data/profiles"))
+
+
+class _Sampler(threading.Thread):
+    def __init__(self, target_ident: int, interval: float):
+        super().__init__(name="slow-request-sampler", daemon=True)
+        self.target_ident = target_ident
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_ident)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{Path(code.co_filename).name}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+@contextmanager
+def profile_if_slow(label: str):
+    """Sample the current thread; keep the profile only if the block is slow"""
+    if PROFILE_SLOW_MS <= 0 or random.random() >= PROFILE_SAMPLE_RATE:
+        yield
+        return
+
+    sampler = _Sampler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000)
+    start = time.perf_counter()
+    sampler.start()
+    try:
+        yield
+    finally:
+        sampler.stop()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms >= PROFILE_SLOW_MS and sampler.samples:
+            PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+            safe_label = "".join(c if c.isalnum() or c in "-_" else "_" for c in label)
+            path = PROFILE_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{safe_label}.folded"
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in sampler.samples.most_common():
+                    f.write(f"{stack} {count}\n")
+            print(f"Slow request ({elapsed_ms:.0f} ms) profile saved to: {path}")
@@ -0,0 +1,146 @@
+"""Process-wide shared clients for the agent.
+
+The Gemini chat model, the embeddings (EMBEDDING_BACKEND), the FAISS index, its
+category shards and the BM25 index are built on first use rather than at import time, so
+importing the agent needs neither GOOGLE_API_KEY nor the indexes on disk.
+Each is created once per process; ``init_timings()`` reports what the one-time builds cost.
+
+``override`` swaps in other implementations (stubs in benchmarks) before
+first use.
+"""
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+
+from agents import metrics
+
+# Add ingestion folder to path for imports
+sys.path.append(str(Path(__file__).parent.parent / "ingestion"))
+
+# --------------------------------------------------
+# CONFIG
+# --------------------------------------------------
+LLM_MODEL = os.getenv("LLM_MODEL", "gemini-2.5-flash")
+VECTORSTORE_PATH = os.getenv("VECTORSTORE_PATH", "data/processed/faiss_index")
+BM25_INDEX_PATH = os.getenv("BM25_INDEX_PATH", "data/processed/bm25_index.json")
+FAQS_PATH = os.getenv("FAQS_PATH", "data/processed/faqs.jsonl")
+
+_resources: Dict[str, object] = {}
+_timings: Dict[str, float] = {}
+_lock = threading.RLock()
+
+
+def _get(name: str, build):
+    resource = _resources.get(name)
+    if resource is not None:
+        return resource
+    with _lock:
+        if name not in _resources:
+            start = time.perf_counter()
+            _resources[name] = build()
+            seconds = time.perf_counter() - start
+            _timings[name] = seconds
+            metrics.observe("init_seconds", seconds, resource=name)
+            print(f"✓ {name} ready in {seconds * 1000:.0f} ms")
+        return _resources[name]
+
+
+# --------------------------------------------------
+# BUILDERS
+# --------------------------------------------------
+def _build_llm():
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(
+        model=LLM_MODEL,
+        temperature=0,
+        streaming=True,   # Enable streaming for better UX
+        google_api_key=os.environ["GOOGLE_API_KEY"],
+        callbacks=[metrics.usage_callback],  # per-node call/token counts
+    )
+
+
+def _build_embeddings():
+    # EMBEDDING_BACKEND: "gemini" or "local" (offline hashing)
+    from embedding_backends import get_embeddings_backend
+
+    return get_embeddings_backend()
+
+
+def _build_vectorstore():
+    from embedding_backends import check_index_meta
+    from index_store import load_index
+    from index_variants import apply_search_params
+
+    # Memory-mapped vectors, documents read per hit (ingestion/index_store.py)
+    embeddings = get_embeddings()
+    vectorstore = load_index(VECTORSTORE_PATH, embeddings)
+    check_index_meta(VECTORSTORE_PATH, embeddings, vectorstore.index.d)
+    apply_search_params(vectorstore.index)  # INDEX_NPROBE / INDEX_EF_SEARCH
+    return vectorstore
+
+
+def _build_shards():
+    from agents.shards import ShardSet
+
+    # Manifest only; each shard is memory-mapped on first search
+    return ShardSet(Path(VECTORSTORE_PATH), get_embeddings())
+
+
+def _build_lexical_index():
+    from bm25 import load_or_build
+
+    return load_or_build(Path(BM25_INDEX_PATH), Path(FAQS_PATH))
+
+
+# --------------------------------------------------
+# ACCESSORS
+# --------------------------------------------------
+def get_llm():
+    """Get or create the shared chat model"""
+    return _get("llm", _build_llm)
+
+
+def get_embeddings():
+    """Get or create the shared embeddings client"""
+    return _get("embeddings", _build_embeddings)
+
+
+def get_vectorstore():
+    """Get or load the shared FAISS index"""
+    return _get("vectorstore", _build_vectorstore)
+
+
+def get_shards():
+    """Get the shared per-category shards of the FAISS index"""
+    return _get("shards", _build_shards)
+
+
+def get_lexical_index():
+    """Get or load the shared BM25 index"""
+    return _get("lexical_index", _build_lexical_index)
+
+
+def override(**resources):
+    """Replace shared resources (llm=, embeddings=, vectorstore=, shards=, lexical_index=)"""
+    with _lock:
+        for name, resource in resources.items():
+            if name not in ("llm", "embeddings", "vectorstore", "shards", "lexical_index"):
+                raise ValueError(f"Unknown resource: {name}")
+            _resources[name] = resource
+            if name == "embeddings" and "vectorstore" in _resources:
+                _resources["vectorstore"].embedding_function = resource
+        # Shards on disk belong to the index at VECTORSTORE_PATH, not to a replacement
+        if "vectorstore" in resources and "shards" not in resources:
+            from agents.shards import ShardSet
+
+            _resources["shards"] = ShardSet.disabled()
+
+
+def init_timings() -> Dict[str, float]:
+    """Seconds spent building each resource so far"""
+    with _lock:
+        return dict(_timings)
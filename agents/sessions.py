@@ -0,0 +1,82 @@
+"""Registry of live conversation threads.
+
+Every browser session gets its own checkpoint thread. The registry keeps
+them in LRU order and deletes a thread from the checkpointer when it has
+been idle for ``idle_seconds`` or when more than ``max_threads`` are
+live, so stored state grows with concurrent users rather than with total
+traffic.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# --------------------------------------------------
+# CONFIG
+# --------------------------------------------------
+SESSION_IDLE_SECONDS = float(os.getenv("SESSION_IDLE_SECONDS", "1800"))
+SESSION_MAX_THREADS = int(os.getenv("SESSION_MAX_THREADS", "1000"))
+
+
+def new_thread_id() -> str:
+    return f"session-{uuid.uuid4().hex}"
+
+
+class SessionRegistry:
+    """LRU of thread IDs with idle-timeout eviction"""
+
+    def __init__(
+        self,
+        checkpointer,
+        idle_seconds: float = SESSION_IDLE_SECONDS,
+        max_threads: int = SESSION_MAX_THREADS,
+    ):
+        self.checkpointer = checkpointer
+        self.idle_seconds = idle_seconds
+        self.max_threads = max_threads
+        self._last_seen: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def touch(self, thread_id: str):
+        """Mark a thread as active and evict whatever is now out of bounds"""
+        with self._lock:
+            self._last_seen[thread_id] = time.monotonic()
+            self._last_seen.move_to_end(thread_id)
+            expired = self._collect()
+        self._evict(expired)
+
+    def is_live(self, thread_id: str) -> bool:
+        with self._lock:
+            return thread_id in self._last_seen
+
+    def evict_idle(self) -> int:
+        """Evict idle threads now; returns how many were removed"""
+        with self._lock:
+            expired = self._collect()
+        self._evict(expired)
+        return len(expired)
+
+    def _collect(self):
+        cutoff = time.monotonic() - self.idle_seconds
+        expired = []
+        # Oldest first, so stop at the first thread that is still fresh
+        for thread_id, seen in list(self._last_seen.items()):
+            if seen >= cutoff and len(self._last_seen) <= self.max_threads:
+                break
+            del self._last_seen[thread_id]
+            expired.append(thread_id)
+        return expired
+
+    def _evict(self, thread_ids):
+        for thread_id in thread_ids:
+            try:
+                self.checkpointer.delete_thread(thread_id)
+                self.evicted += 1
+            except Exception as e:
+                print(f"Could not evict thread {thread_id}: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"live_threads": len(self._last_seen), "evicted": self.evicted}
@@ -0,0 +1,117 @@
+"""Category-sharded vector search.
+
+build_index.py writes one sub-index per category under
+``<VECTORSTORE_PATH>/shards/`` plus a manifest with each category's
+document count and centroid (the normalised mean of its vectors).
+
+``predict`` compares the query vector with the centroids; when one
+category is both close enough (SHARD_MIN_SIMILARITY) and ahead of the
+next by SHARD_MARGIN, retrieval searches only that shard. Otherwise, or
+when there are no shards or SHARDED_RETRIEVAL is off (the default), it
+searches the global index. Shards are memory-mapped on first use and at
+most SHARD_CACHE_SIZE stay open (LRU).
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from agents import metrics
+
+# --------------------------------------------------
+# CONFIG
+# --------------------------------------------------
+# Off until the thresholds are checked on real query vectors:
+# python -m benchmarks.retrieval_bench --embeddings gemini
+SHARDED_RETRIEVAL = os.getenv("SHARDED_RETRIEVAL", "0") == "1"
+SHARD_CACHE_SIZE = int(os.getenv("SHARD_CACHE_SIZE", "4"))
+# Gemini embedding-001 puts every FAQ within ~0.95 of its category centroid,
+# so the margin over the runner-up category is what separates them
+SHARD_MIN_SIMILARITY = float(os.getenv("SHARD_MIN_SIMILARITY", "0.5"))
+SHARD_MARGIN = float(os.getenv("SHARD_MARGIN", "0.03"))
+
+SHARDS_DIR = "shards"
+SHARD_MANIFEST = "manifest.json"
+
+
+def load_manifest(index_dir: Path) -> dict:
+    """{category: {"dir", "count", "centroid"}}, empty when there are no shards"""
+    path = Path(index_dir) / SHARDS_DIR / SHARD_MANIFEST
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def nearest(centroids: np.ndarray, vector: List[float]) -> Tuple[int, float, float]:
+    """Row of the closest centroid, its cosine and the runner-up's"""
+    vec = np.asarray(vector, dtype=np.float32)
+    sims = centroids @ (vec / np.linalg.norm(vec))
+    order = np.argsort(sims)[::-1]
+    return int(order[0]), float(sims[order[0]]), float(sims[order[1]])
+
+
+class ShardSet:
+    """The category shards of one index directory"""
+
+    def __init__(self, index_dir: Optional[Path], embeddings=None, cache_size: int = SHARD_CACHE_SIZE):
+        self.embeddings = embeddings
+        self.cache_size = cache_size
+        self.categories: List[str] = []
+        self.centroids: Optional[np.ndarray] = None
+        self._dirs = {}
+        self._open: "OrderedDict[str, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        manifest = load_manifest(index_dir) if SHARDED_RETRIEVAL and index_dir else {}
+        if not manifest:
+            return
+        self.categories = list(manifest)
+        self.centroids = np.array([manifest[c]["centroid"] for c in self.categories], dtype=np.float32)
+        self._dirs = {c: Path(index_dir) / SHARDS_DIR / manifest[c]["dir"] for c in self.categories}
+
+    @classmethod
+    def disabled(cls) -> "ShardSet":
+        return cls(None)
+
+    def predict(self, vector: List[float]) -> Optional[str]:
+        """The query's category, or None when it is not clearly one"""
+        if len(self.categories) < 2:
+            return None
+        row, best, second = nearest(self.centroids, vector)
+        if best < SHARD_MIN_SIMILARITY or best - second < SHARD_MARGIN:
+            metrics.incr("shard_predictions_total", result="unsure")
+            return None
+        category = self.categories[row]
+        metrics.incr("shard_predictions_total", result="hit", category=category)
+        return category
+
+    def get(self, category: str):
+        """The open shard for ``category``, loading it (and evicting the
+        least recently used one) if needed"""
+        with self._lock:
+            shard = self._open.get(category)
+            if shard is not None:
+                self._open.move_to_end(category)
+                return shard
+
+            from embedding_backends import check_index_meta
+            from index_store import load_index
+            from index_variants import apply_search_params
+
+            start = time.perf_counter()
+            shard = load_index(self._dirs[category], self.embeddings)
+            check_index_meta(self._dirs[category], self.embeddings, shard.index.d)
+            apply_search_params(shard.index)
+            metrics.observe("shard_load_seconds", time.perf_counter() - start)
+
+            self._open[category] = shard
+            if len(self._open) > self.cache_size:
+                self._open.popitem(last=False)
+                metrics.incr("shard_evictions_total")
+            return shard
@@ -1,11 +1,55 @@
+import asyncio
+import os
+import threading
+
 import streamlit as st
 from dotenv import load_dotenv
-from agents.agents import agent
-from langchain_core.messages import HumanMessage, AIMessage
+from agents.agents import astream, sessions, warm_up, STREAMING_NODES
+from agents.sessions import new_thread_id
+from agents import metrics
 
 # Load environment variables (e.g., GOOGLE_API_KEY)
 load_dotenv()
 
+# Only the most recent messages are rendered on each rerun; older ones are
+# revealed a page at a time with "Load earlier messages"
+CHAT_HISTORY_WINDOW = int(os.getenv("CHAT_HISTORY_WINDOW", "20"))
+
+
+@st.cache_resource
+def get_agent_loop() -> asyncio.AbstractEventLoop:
+    """One background event loop shared by every session, so concurrent
+    conversations wait on Gemini without each holding a thread."""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="agent-loop", daemon=True).start()
+    return loop
+
+
+@st.cache_resource
+def start_metrics_endpoint():
+    """Prometheus /metrics on METRICS_PORT, once per process"""
+    port = os.getenv("METRICS_PORT")
+    return metrics.start_metrics_server(int(port)) if port else None
+
+
+start_metrics_endpoint()
+
+
+@st.cache_resource
+def warm_up_agent() -> dict:
+    """Load the index and open clients once per process, not per session"""
+    return warm_up()
+
+
+def iterate_async(agen):
+    """Consume an async generator from Streamlit's script thread"""
+    loop = get_agent_loop()
+    while True:
+        try:
+            yield asyncio.run_coroutine_threadsafe(agen.__anext__(), loop).result()
+        except StopAsyncIteration:
+            break
+
 
 st.set_page_config(
     page_title="Jashanmal customer Support Assistant",
@@ -16,12 +60,19 @@ st.set_page_config(
 st.title("💬 Jashanmal Customer Support")
 st.caption("Ask anything about orders, payments, shipping, returns & more.")
 
+with st.spinner("Loading knowledge base..."):
+    warm_up_agent()
+
 if "messages" not in st.session_state:
+    # (role, content) tuples, role is "user" or "assistant"
     st.session_state.messages = []
 
+if "history_window" not in st.session_state:
+    st.session_state.history_window = CHAT_HISTORY_WINDOW
+
 if "thread_id" not in st.session_state:
-    # for future persistence / checkpoints
-    st.session_state.thread_id = "demo-thread-1"
+    # One checkpoint thread per browser session
+    st.session_state.thread_id = new_thread_id()
 
 if "booking_slots" not in st.session_state:
     st.session_state.booking_slots = []
@@ -36,18 +87,30 @@ if "selected_booking_slot" not in st.session_state:
     st.session_state.selected_booking_slot = None
     
     
-for msg in st.session_state.messages:
-    if isinstance(msg, HumanMessage):
-        with st.chat_message("user"):
-            st.markdown(msg.content)
-    elif isinstance(msg, AIMessage):
-        with st.chat_message("assistant"):
-            st.markdown(msg.content)
+def load_earlier_messages():
+    st.session_state.history_window += CHAT_HISTORY_WINDOW
+
+
+# Render only the last `history_window` messages, so a rerun costs the
+# same however long the conversation is
+hidden = max(0, len(st.session_state.messages) - st.session_state.history_window)
+if hidden:
+    st.button(
+        f"⬆️ Load earlier messages ({hidden} hidden)",
+        on_click=load_earlier_messages,
+    )
+
+for role, content in st.session_state.messages[hidden:]:
+    with st.chat_message(role):
+        st.markdown(content)
             
             
 user_input = st.chat_input("How can I help you today?")
 
 if user_input:
+    # Back to the default window once the conversation moves on
+    st.session_state.history_window = CHAT_HISTORY_WINDOW
+
     # Check if user is providing their email for booking
     if st.session_state.awaiting_user_email and st.session_state.selected_booking_slot:
         # Validate email format (basic check)
@@ -58,8 +121,7 @@ if user_input:
             user_email = user_input.strip()
             selected_slot = st.session_state.selected_booking_slot
             
-            human_msg = HumanMessage(content=user_input)
-            st.session_state.messages.append(human_msg)
+            st.session_state.messages.append(("user", user_input))
             
             with st.chat_message("user"):
                 st.markdown(user_input)
@@ -88,8 +150,7 @@ if user_input:
                     response = "I'm sorry, there was an issue creating the meeting. Please try again or contact us directly at:\n\n📧 Email: support@jashanmal.com\n📞 Call: 800 562 63"
                 
                 st.markdown(response)
-                ai_msg = AIMessage(content=response)
-                st.session_state.messages.append(ai_msg)
+                st.session_state.messages.append(("assistant", response))
                 
                 # Reset booking state
                 st.session_state.awaiting_user_email = False
@@ -99,8 +160,7 @@ if user_input:
                 st.stop()
         else:
             # Invalid email format
-            human_msg = HumanMessage(content=user_input)
-            st.session_state.messages.append(human_msg)
+            st.session_state.messages.append(("user", user_input))
             
             with st.chat_message("user"):
                 st.markdown(user_input)
@@ -108,8 +168,7 @@ if user_input:
             with st.chat_message("assistant"):
                 response = "⚠️ That doesn't look like a valid email address. Please provide a valid email (e.g., yourname@example.com) so I can send you the calendar invitation."
                 st.markdown(response)
-                ai_msg = AIMessage(content=response)
-                st.session_state.messages.append(ai_msg)
+                st.session_state.messages.append(("assistant", response))
                 st.stop()
     
     # Check if user is selecting a booking slot
@@ -120,8 +179,7 @@ if user_input:
                 # User selected a valid slot - now ask for email
                 selected_slot = st.session_state.booking_slots[slot_number - 1]
                 
-                human_msg = HumanMessage(content=user_input)
-                st.session_state.messages.append(human_msg)
+                st.session_state.messages.append(("user", user_input))
                 
                 with st.chat_message("user"):
                     st.markdown(user_input)
@@ -129,8 +187,7 @@ if user_input:
                 with st.chat_message("assistant"):
                     response = f"Great choice! You've selected **{selected_slot['display']}**.\n\n📧 Please provide your email address so I can send you the calendar invitation."
                     st.markdown(response)
-                    ai_msg = AIMessage(content=response)
-                    st.session_state.messages.append(ai_msg)
+                    st.session_state.messages.append(("assistant", response))
                     
                     # Update state to await email
                     st.session_state.selected_booking_slot = selected_slot
@@ -141,8 +198,7 @@ if user_input:
             # Not a number, continue with normal flow
             pass
     
-    human_msg = HumanMessage(content=user_input)
-    st.session_state.messages.append(human_msg)
+    st.session_state.messages.append(("user", user_input))
 
     with st.chat_message("user"):
         st.markdown(user_input)
@@ -153,29 +209,41 @@ if user_input:
         
         full_response = ""
         streaming_response = ""
-        is_answer_node = False
+        status_placeholder.markdown("🔍 *Analyzing your question...*")
+        sessions.touch(st.session_state.thread_id)
         
-        # Stream through agent nodes
-        for chunk in agent.stream(
-            {"query": user_input},
-            config={
-                "configurable": {
-                    "thread_id": st.session_state.thread_id
-                }
-            },
-            stream_mode="updates"
+        # Stream node updates and LLM tokens as they are produced
+        for mode, chunk in iterate_async(
+            astream(user_input, st.session_state.thread_id)
         ):
+            if mode == "messages":
+                token, metadata = chunk
+                if (
+                    metadata.get("langgraph_node") in STREAMING_NODES
+                    and isinstance(token.content, str)
+                    and token.content
+                ):
+                    if not streaming_response:
+                        status_placeholder.empty()
+                    streaming_response += token.content
+                    response_placeholder.markdown(streaming_response + "▌")
+                continue
+            
             # Show which node is processing
             node_name = list(chunk.keys())[0] if chunk else ""
             
+            # Updates arrive when a node finishes, so announce the next step
             if node_name == "router":
-                status_placeholder.markdown("🔍 *Analyzing your question...*")
+                if chunk[node_name].get("route") == "rag":
+                    status_placeholder.markdown("📚 *Searching knowledge base...*")
             elif node_name == "retrieve":
-                status_placeholder.markdown("📚 *Searching knowledge base...*")
+                # Served from the answer cache or verbatim from the FAQ,
+                # no answer node follows
+                if chunk[node_name].get("cache_hit") or chunk[node_name].get("direct_answer"):
+                    full_response = chunk[node_name]["answer"]
+                else:
+                    status_placeholder.markdown("✍️ *Generating response...*")
             elif node_name == "answer":
-                is_answer_node = True
-                status_placeholder.markdown("✍️ *Generating response...*")
-                
                 if "answer" in chunk.get(node_name, {}):
                     full_response = chunk[node_name]["answer"]
                     
@@ -200,21 +268,9 @@ if user_input:
         status_placeholder.empty()
         
         if not full_response:
-            full_response = "Sorry, something went wrong."
+            full_response = streaming_response.strip() or "Sorry, something went wrong."
         
-        # Stream the response word by word for better UX
-        if full_response:
-            import time
-            words = full_response.split()
-            streaming_response = ""
-            
-            for word in words:
-                streaming_response += word + " "
-                response_placeholder.markdown(streaming_response + "▌")
-                time.sleep(0.02)  # Adjust speed (0.02 = 50 words/sec)
-            
-            # Show final response without cursor
-            response_placeholder.markdown(full_response)
+        # Show final response without cursor
+        response_placeholder.markdown(full_response)
         
-        ai_msg = AIMessage(content=full_response)
-        st.session_state.messages.append(ai_msg)
\ No newline at end of file
+        st.session_state.messages.append(("assistant", full_response))
\ No newline at end of file
@@ -0,0 +1,171 @@
+"""Recall, latency and size of FAISS index variants against exact search.
+
+Builds every INDEX_TYPE preset from ``ingestion/index_variants.py`` over
+the same vectors and reports, per variant: build time, serialized size,
+recall@k against the flat index, single-query latency percentiles and
+batch throughput.
+
+The vectors are synthetic by default (unit-length, clustered like text
+embeddings) so large corpora can be simulated offline; ``--store`` uses
+the document vectors in the embedding store instead.
+
+Usage (from the repo root):
+
+    python -m benchmarks.index_bench
+    python -m benchmarks.index_bench --n 200000 --dim 768 --variants flat sq8 ivf_pq
+    python -m benchmarks.index_bench --nprobe 8 16 32
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent / "ingestion"))
+
+import faiss
+import index_variants
+
+DEFAULT_OUTPUT = Path("benchmarks/results/index.json")
+
+
+# --------------------------------------------------
+# DATA
+# --------------------------------------------------
+def synthetic(n: int, dim: int, clusters: int, latent: int = 64, seed: int = 0) -> np.ndarray:
+    """Unit vectors around ``clusters`` topics in a ``latent``-dim subspace.
+
+    Text embeddings have far fewer degrees of freedom than dimensions;
+    isotropic noise in all ``dim`` directions would make every ANN index
+    look much worse than it is on real data.
+    """
+    rng = np.random.default_rng(seed)
+    projection = rng.standard_normal((latent, dim)).astype(np.float32)
+    centers = rng.standard_normal((clusters, latent)).astype(np.float32)
+    z = centers[rng.integers(0, clusters, n)] + 0.5 * rng.standard_normal((n, latent)).astype(np.float32)
+    x = z @ projection + 0.5 * rng.standard_normal((n, dim)).astype(np.float32)
+    faiss.normalize_L2(x)
+    return x
+
+
+def from_store() -> np.ndarray:
+    from embedding_store import EmbeddingStore
+
+    store = EmbeddingStore()
+    models = store.models()
+    if not models:
+        raise SystemExit("The embedding store is empty; run ingestion/build_index.py first")
+    # The model with the most stored documents
+    model = max(models, key=models.get)
+    print(f"Using {models[model]} vectors of {model}")
+    return np.array(store.vectors(model), dtype=np.float32)
+
+
+def make_queries(x: np.ndarray, count: int, seed: int = 1) -> np.ndarray:
+    """Perturbed corpus vectors, so each query has real neighbours"""
+    rng = np.random.default_rng(seed)
+    q = x[rng.integers(0, len(x), count)] + 0.02 * rng.standard_normal((count, x.shape[1])).astype(np.float32)
+    faiss.normalize_L2(q)
+    return q
+
+
+# --------------------------------------------------
+# MEASUREMENT
+# --------------------------------------------------
+def index_bytes(index: faiss.Index) -> int:
+    return int(faiss.serialize_index(index).size)
+
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def measure(index: faiss.Index, queries: np.ndarray, truth: np.ndarray, k: int) -> dict:
+    # One query at a time, as the agent searches
+    latencies = []
+    found = []
+    for q in queries:
+        start = time.perf_counter()
+        _, ids = index.search(q[None, :], k)
+        latencies.append(time.perf_counter() - start)
+        found.append(ids[0])
+    arr = np.asarray(latencies) * 1000
+
+    start = time.perf_counter()
+    index.search(queries, k)
+    batch = time.perf_counter() - start
+
+    return {
+        f"recall@{k}": round(recall(np.array(found), truth), 4),
+        "p50_ms": round(float(np.percentile(arr, 50)), 4),
+        "p95_ms": round(float(np.percentile(arr, 95)), 4),
+        "batch_qps": round(len(queries) / batch, 1),
+    }
+
+
+# --------------------------------------------------
+# MAIN
+# --------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--n", type=int, default=100_000, help="Synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--store", action="store_true", help="Use vectors from the embedding store")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--variants", nargs="+", default=list(index_variants.PRESETS))
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[index_variants.INDEX_NPROBE])
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    x = from_store() if args.store else synthetic(args.n, args.dim, args.clusters)
+    queries = make_queries(x, args.queries)
+    n, dim = x.shape
+    print(f"{n} vectors, dim {dim}, {len(queries)} queries, k={args.k}\n")
+
+    flat = index_variants.build(x, "Flat")
+    _, truth = flat.search(queries, args.k)
+
+    results = []
+    for variant in args.variants:
+        spec = index_variants.resolve(variant, n, dim)
+        start = time.perf_counter()
+        index = index_variants.build(x, spec)
+        build_s = time.perf_counter() - start
+
+        # nprobe only matters for IVF; other variants run once
+        for nprobe in args.nprobe if spec.startswith("IVF") else [None]:
+            if nprobe is not None:
+                faiss.ParameterSpace().set_index_parameter(index, "nprobe", nprobe)
+            row = {
+                "variant": variant,
+                "factory": spec,
+                "nprobe": nprobe,
+                "build_s": round(build_s, 2),
+                "size_mb": round(index_bytes(index) / 1e6, 2),
+                **measure(index, queries, truth, args.k),
+            }
+            results.append(row)
+            label = f"{variant}" + (f" nprobe={nprobe}" if nprobe else "")
+            print(
+                f"{label:<22} {spec:<16} recall@{args.k} {row[f'recall@{args.k}']:.3f}  "
+                f"p50 {row['p50_ms']:>8.3f} ms  p95 {row['p95_ms']:>8.3f} ms  "
+                f"{row['batch_qps']:>9.0f} q/s  {row['size_mb']:>8.1f} MB  build {row['build_s']:.1f}s"
+            )
+
+    report = {
+        "meta": {"n": n, "dim": dim, "queries": len(queries), "k": args.k, "store": args.store},
+        "results": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport saved to: {args.output.resolve()}")
+
+
+if __name__ == "__main__":
+    main()
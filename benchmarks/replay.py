@@ -0,0 +1,330 @@
+"""Offline replay benchmark for the compiled agent.
+
+Replays a query corpus through the LangGraph agent with the stub LLM,
+embeddings and calendar from ``benchmarks/stubs.py`` and reports
+end-to-end, time-to-first-token and per-node latency percentiles,
+throughput at several concurrency levels, and peak RSS.
+
+Before timing anything it replays the corpus once through the synchronous
+graph (``graph.invoke``) and asserts that no query embeds more than once
+and that queries with a strong BM25 match do not embed at all.
+
+Usage (from the repo root):
+
+    python -m benchmarks.replay
+    python -m benchmarks.replay --concurrency 1 8 32 --llm-ttft-ms 400
+    python -m benchmarks.replay --corpus queries.jsonl --compare old.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent / "ingestion"))
+
+from benchmarks.stubs import StubCalendar, StubChatModel, StubEmbeddings
+
+FAQS_PATH = Path("data/processed/faqs.jsonl")
+DEFAULT_OUTPUT = Path("benchmarks/results/replay.json")
+
+EXTRA_QUERIES = [
+    "hi",
+    "thanks!",
+    "what is your phone number",
+    "how can I contact customer support",
+    "I want to book a call",
+    "can I schedule a meeting with your team",
+    "what's the weather like today",
+    "tell me a joke",
+]
+
+
+# --------------------------------------------------
+# CORPUS
+# --------------------------------------------------
+def build_corpus() -> List[str]:
+    """Queries derived from faqs.jsonl headings plus non-RAG traffic"""
+    from records import iter_records
+
+    headings = []
+    for record in iter_records(FAQS_PATH):
+        heading = record.get("question") or record.get("title")
+        if heading and heading not in headings:
+            headings.append(heading)
+
+    queries = []
+    for heading in headings:
+        queries.append(heading)
+        queries.append(f"Can you tell me about {heading.lower()}?")
+        queries.append(f"{heading.lower()} - how does it work")
+    return queries + EXTRA_QUERIES
+
+
+def load_corpus(path: Path) -> List[str]:
+    """One JSON object per line with a "query" (or "title") field"""
+    queries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                queries.append(item.get("query") or item["title"])
+    return queries
+
+
+# --------------------------------------------------
+# AGENT WITH STUBS
+# --------------------------------------------------
+def load_agent(args):
+    """Import the agent module and swap every remote dependency for a stub"""
+    from agents import agents, resources
+    from booking import calendar_service
+    from db.database import SQLiteCheckpointer
+    from index_store import load_index
+
+    # Only the index comes from disk; nothing talks to Google
+    embeddings = StubEmbeddings(latency_ms=args.embed_ms)
+    vectorstore = load_index(resources.VECTORSTORE_PATH, embeddings)
+    embeddings.dim = vectorstore.index.d
+    resources.override(
+        llm=StubChatModel(
+            ttft_ms=args.llm_ttft_ms,
+            token_ms=args.llm_token_ms,
+            callbacks=[agents.metrics.usage_callback],
+        ),
+        embeddings=embeddings,
+        vectorstore=vectorstore,
+    )
+    calendar_service._calendar_service = StubCalendar(latency_ms=args.calendar_ms)
+
+    if not args.answer_cache:
+        agents.answer_cache.max_entries = 0
+
+    checkpoint_dir = tempfile.mkdtemp(prefix="bench-checkpoints-")
+    checkpointer = SQLiteCheckpointer(path=str(Path(checkpoint_dir) / "bench.sqlite"))
+    return agents, agents.graph.compile(checkpointer=checkpointer)
+
+
+# --------------------------------------------------
+# MEASUREMENT
+# --------------------------------------------------
+def percentiles(values: List[float]) -> dict:
+    if not values:
+        return {}
+    arr = np.asarray(values) * 1000
+    return {
+        "count": len(values),
+        "mean_ms": round(float(arr.mean()), 2),
+        "p50_ms": round(float(np.percentile(arr, 50)), 2),
+        "p95_ms": round(float(np.percentile(arr, 95)), 2),
+        "p99_ms": round(float(np.percentile(arr, 99)), 2),
+    }
+
+
+async def run_query(agent, streaming_nodes, query: str, thread_id: str) -> dict:
+    start = time.perf_counter()
+    last = start
+    first_token = None
+    nodes = {}
+
+    async for mode, chunk in agent.astream(
+        {"query": query},
+        config={"configurable": {"thread_id": thread_id}},
+        stream_mode=["updates", "messages"],
+    ):
+        now = time.perf_counter()
+        if mode == "messages":
+            token, metadata = chunk
+            if first_token is None and metadata.get("langgraph_node") in streaming_nodes:
+                first_token = now - start
+            continue
+        # The graph is a chain, so the time since the previous update is
+        # the node's own time
+        for node in chunk:
+            nodes[node] = now - last
+        last = now
+
+    total = time.perf_counter() - start
+    return {"total": total, "ttft": first_token if first_token is not None else total, "nodes": nodes}
+
+
+async def run_level(agent, streaming_nodes, queries: List[str], concurrency: int) -> dict:
+    sem = asyncio.Semaphore(concurrency)
+    results = []
+
+    async def worker(i, query):
+        async with sem:
+            results.append(await run_query(agent, streaming_nodes, query, f"bench-{concurrency}-{i}"))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i, q) for i, q in enumerate(queries)))
+    wall = time.perf_counter() - start
+
+    node_times: Dict[str, List[float]] = defaultdict(list)
+    for r in results:
+        for node, seconds in r["nodes"].items():
+            node_times[node].append(seconds)
+
+    return {
+        "concurrency": concurrency,
+        "queries": len(results),
+        "wall_s": round(wall, 3),
+        "throughput_qps": round(len(results) / wall, 2),
+        "end_to_end": percentiles([r["total"] for r in results]),
+        "ttft": percentiles([r["ttft"] for r in results]),
+        "nodes": {node: percentiles(v) for node, v in sorted(node_times.items())},
+    }
+
+
+def check_embed_calls(agents, agent, queries: List[str]) -> dict:
+    """Embedding calls per query through the whole graph (sync path).
+
+    Stub latencies are zeroed for the check, and the answer cache is
+    cleared before each query so no answer is served from it.
+    """
+    from agents import resources
+
+    embeddings, llm = resources.get_embeddings(), resources.get_llm()
+    saved = embeddings.latency_ms, llm.ttft_ms, llm.token_ms
+    embeddings.latency_ms = llm.ttft_ms = llm.token_ms = 0
+
+    strong_embeds, max_embeds, lexical_strong = 0, 0, 0
+    try:
+        for i, query in enumerate(queries):
+            agents.answer_cache.clear()
+            strong = agents.metrics.counter_value("lexical_search_total", result="strong")
+            calls = embeddings.calls
+            agent.invoke({"query": query}, config={"configurable": {"thread_id": f"bench-embeds-{i}"}})
+            calls = embeddings.calls - calls
+            max_embeds = max(max_embeds, calls)
+            if agents.metrics.counter_value("lexical_search_total", result="strong") > strong:
+                lexical_strong += 1
+                strong_embeds += calls
+    finally:
+        embeddings.latency_ms, llm.ttft_ms, llm.token_ms = saved
+        agents.answer_cache.clear()
+
+    assert strong_embeds == 0, f"{strong_embeds} embedding calls for strong lexical matches"
+    assert max_embeds <= 1, f"a query embedded {max_embeds} times"
+    return {"queries": len(queries), "lexical_strong": lexical_strong, "max_embeds_per_query": max_embeds}
+
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KiB on Linux, bytes on macOS
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(report: dict, baseline_path: Path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    old_runs = {r["concurrency"]: r for r in baseline["runs"]}
+
+    print(f"\nCompared with {baseline_path} ({baseline['meta']['commit']}):")
+    for run in report["runs"]:
+        old = old_runs.get(run["concurrency"])
+        if not old:
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            a, b = old["end_to_end"][key], run["end_to_end"][key]
+            print(f"  c={run['concurrency']:<3} {key}: {a:>9.1f} -> {b:>9.1f} ({(b - a) / a:+.1%})")
+        a, b = old["throughput_qps"], run["throughput_qps"]
+        print(f"  c={run['concurrency']:<3} qps:    {a:>9.2f} -> {b:>9.2f} ({(b - a) / a:+.1%})")
+
+
+# --------------------------------------------------
+# MAIN
+# --------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--corpus", type=Path, help="JSONL file of queries (default: derived from faqs.jsonl)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the corpus this many times per level")
+    parser.add_argument("--llm-ttft-ms", type=float, default=300.0)
+    parser.add_argument("--llm-token-ms", type=float, default=10.0)
+    parser.add_argument("--embed-ms", type=float, default=80.0)
+    parser.add_argument("--calendar-ms", type=float, default=200.0)
+    parser.add_argument("--no-answer-cache", dest="answer_cache", action="store_false")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--compare", type=Path, help="Previous JSON report to diff against")
+    args = parser.parse_args()
+
+    queries = load_corpus(args.corpus) if args.corpus else build_corpus()
+    queries = queries * args.repeat
+
+    agents, agent = load_agent(args)
+
+    # Warm-up: fits the pre-router centroids and touches every code path once
+    agents.warm_up()
+    asyncio.run(run_query(agent, agents.STREAMING_NODES, queries[0], "bench-warmup"))
+
+    embeds = check_embed_calls(agents, agent, queries)
+    print(
+        f"Embed calls: 0 for {embeds['lexical_strong']} strong lexical matches, "
+        f"at most {embeds['max_embeds_per_query']} per query ({embeds['queries']} queries)"
+    )
+
+    runs = []
+    for level in args.concurrency:
+        agents.answer_cache.clear()
+        agents.metrics.reset()
+        run = asyncio.run(run_level(agent, agents.STREAMING_NODES, queries, level))
+        run["counters"] = agents.metrics.snapshot()["counters"]
+        runs.append(run)
+        e2e = run["end_to_end"]
+        print(
+            f"c={level:<3} {run['throughput_qps']:>7.2f} q/s  "
+            f"p50 {e2e['p50_ms']:>8.1f} ms  p95 {e2e['p95_ms']:>8.1f} ms  "
+            f"p99 {e2e['p99_ms']:>8.1f} ms  ttft p50 {run['ttft']['p50_ms']:>8.1f} ms"
+        )
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "corpus_size": len(queries),
+            "stub_latency_ms": {
+                "llm_ttft": args.llm_ttft_ms,
+                "llm_token": args.llm_token_ms,
+                "embed": args.embed_ms,
+                "calendar": args.calendar_ms,
+            },
+            "answer_cache": args.answer_cache,
+        },
+        "embed_calls": embeds,
+        "runs": runs,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nPeak RSS: {report['peak_rss_mb']} MB")
+    print(f"Report saved to: {args.output.resolve()}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
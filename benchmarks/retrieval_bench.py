@@ -0,0 +1,247 @@
+"""Recall and latency of hybrid (BM25 + FAISS) vs pure-vector retrieval.
+
+Every query in the labelled set names the FAQ record it should find (by
+``content_hash``). Both retrievers run the agent's own code paths
+(``agents.agents.search`` and ``agents.hybrid``); the report gives
+recall@1/@k, MRR, latency percentiles and how many queries needed an
+embedding call. It also reports how ``agents.shards`` would route the query
+vectors to category shards: coverage and accuracy per SHARD_MARGIN.
+
+Both run against the shipped indexes: the BM25 index and the documents
+and metadata of the saved FAISS index, exactly as the agent loads them.
+By default the query embeddings come from ``StubEmbeddings``, so the saved
+documents are re-embedded with it into an in-memory FAISS index and the
+numbers measure the retrieval logic offline. ``--embeddings local`` does
+the same with the offline hashing backend, and ``--embeddings gemini``
+searches the saved vectors with the real embedding API (needs
+GOOGLE_API_KEY).
+
+Usage (from the repo root):
+
+    python -m benchmarks.retrieval_bench
+    python -m benchmarks.retrieval_bench --queries labelled.jsonl --embed-ms 120
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+from benchmarks.stubs import StubEmbeddings
+
+FAQS_PATH = Path("data/processed/faqs.jsonl")
+DEFAULT_OUTPUT = Path("benchmarks/results/retrieval.json")
+
+TEMPLATES = [
+    "{q}",
+    "{q}?",
+    "I have a question about {ql}",
+    "can you help me with {ql}",
+]
+
+
+# --------------------------------------------------
+# LABELLED QUERIES
+# --------------------------------------------------
+def build_queries(records: List[dict]) -> List[Tuple[str, str]]:
+    """(query, content_hash) pairs from each record's question and answer"""
+    queries = []
+    for record in records:
+        question = record.get("question") or record.get("title")
+        if not question:
+            continue
+        for template in TEMPLATES:
+            queries.append((template.format(q=question, ql=question.lower()), record["content_hash"]))
+        # A paraphrase-like query from the start of the answer
+        words = (record.get("answer") or record.get("text", "")).split()[:10]
+        if words:
+            queries.append((" ".join(words), record["content_hash"]))
+    return queries
+
+
+def load_queries(path: Path) -> List[Tuple[str, str]]:
+    """One JSON object per line with "query" and "content_hash" fields"""
+    with open(path, encoding="utf-8") as f:
+        return [
+            (item["query"], item["content_hash"])
+            for item in map(json.loads, filter(str.strip, f))
+        ]
+
+
+# --------------------------------------------------
+# RETRIEVERS
+# --------------------------------------------------
+def vector_retrieve(agents, query: str) -> Tuple[list, bool]:
+    vector = agents.get_embeddings().embed_query(query)
+    return agents.search(vector, agents.RETRIEVER_K), True
+
+
+def hybrid_retrieve(agents, query: str) -> Tuple[list, bool]:
+    from agents.hybrid import fuse, lexical_search
+
+    lexical = lexical_search(agents.get_lexical_index(), query, agents.RETRIEVER_K * 2)
+    if lexical.strong:
+        return lexical.docs[:agents.RETRIEVER_K], False
+    vector = agents.get_embeddings().embed_query(query)
+    return fuse(agents.search(vector), lexical.docs, agents.RETRIEVER_K), True
+
+
+def evaluate(agents, retriever, queries: List[Tuple[str, str]], key_by_hash: dict) -> dict:
+    """Ranks are matched on the record's text: saved indexes may lack content_hash"""
+    latencies, ranks, embed_calls, duplicates = [], [], 0, 0
+    for query, expected in queries:
+        start = time.perf_counter()
+        docs, embedded = retriever(agents, query)
+        latencies.append(time.perf_counter() - start)
+        embed_calls += embedded
+
+        keys = [d.page_content for d in docs]
+        duplicates += len(keys) != len(set(keys))
+        expected = key_by_hash[expected]
+        ranks.append(keys.index(expected) + 1 if expected in keys else None)
+
+    arr = np.asarray(latencies) * 1000
+    n = len(queries)
+    return {
+        "queries": n,
+        "recall@1": round(sum(r == 1 for r in ranks) / n, 4),
+        f"recall@{agents.RETRIEVER_K}": round(sum(r is not None for r in ranks) / n, 4),
+        "mrr": round(sum(1 / r for r in ranks if r) / n, 4),
+        "embed_calls": embed_calls,
+        "duplicate_results": duplicates,
+        "p50_ms": round(float(np.percentile(arr, 50)), 3),
+        "p95_ms": round(float(np.percentile(arr, 95)), 3),
+        "mean_ms": round(float(arr.mean()), 3),
+    }
+
+
+SHARD_MARGINS = (0.0, 0.01, 0.02, 0.03, 0.05, 0.08)
+
+
+def evaluate_routing(embeddings, queries, category_by_hash: dict, categories: List[str], centroids) -> dict:
+    """Share of queries sent to a shard, and to the right one, per margin"""
+    from agents.shards import SHARD_MARGIN, SHARD_MIN_SIMILARITY, nearest
+
+    rows = []
+    for query, expected in queries:
+        row, best, second = nearest(centroids, embeddings.embed_query(query))
+        rows.append((best, best - second, categories[row] == category_by_hash[expected]))
+    best, margin, correct = (np.asarray(col) for col in zip(*rows))
+
+    sweep = []
+    for m in sorted({*SHARD_MARGINS, SHARD_MARGIN}):
+        routed = (best >= SHARD_MIN_SIMILARITY) & (margin >= m)
+        sweep.append({
+            "margin": m,
+            "coverage": round(float(routed.mean()), 4),
+            "accuracy": round(float(correct[routed].mean()), 4) if routed.any() else None,
+        })
+    return {
+        "min_similarity": SHARD_MIN_SIMILARITY,
+        "best_similarity_p5_p50_p95": np.percentile(best, [5, 50, 95]).round(4).tolist(),
+        "margin_p5_p50_p95": np.percentile(margin, [5, 50, 95]).round(4).tolist(),
+        "sweep": sweep,
+    }
+
+
+def category_centroids(vectorstore) -> Tuple[List[str], np.ndarray]:
+    """Normalised mean vector per category, as build_index.py writes them"""
+    sums = {}
+    for position, doc_id in vectorstore.index_to_docstore_id.items():
+        category = vectorstore.docstore.search(doc_id).metadata["category"]
+        vec = vectorstore.index.reconstruct(int(position))
+        sums[category] = sums.get(category, 0) + vec
+    categories = list(sums)
+    centroids = np.array([sums[c] / np.linalg.norm(sums[c]) for c in categories], dtype=np.float32)
+    return categories, centroids
+
+
+# --------------------------------------------------
+# MAIN
+# --------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--queries", type=Path, help="Labelled JSONL (default: derived from faqs.jsonl)")
+    parser.add_argument("--embeddings", choices=["stub", "local", "gemini"], default="stub")
+    parser.add_argument("--embed-ms", type=float, default=80.0, help="Stub embedding latency")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    from agents import agents, resources
+    from agents.shards import load_manifest
+    from index_store import iter_indexed, load_index
+    from records import load_records, record_text
+
+    records = load_records(FAQS_PATH)
+    queries = load_queries(args.queries) if args.queries else build_queries(records)
+    key_by_hash = {r["content_hash"]: record_text(r) for r in records}
+    category_by_hash = {r["content_hash"]: r["category"] for r in records}
+
+    if args.embeddings != "gemini":
+        from langchain_community.vectorstores import FAISS
+        from embedding_backends import get_embeddings_backend
+
+        if args.embeddings == "local":
+            embeddings = get_embeddings_backend("local")
+        else:
+            embeddings = StubEmbeddings(latency_ms=0)
+        # The saved documents and metadata, re-embedded for offline queries
+        docs = [doc for _, _, doc in iter_indexed(load_index(resources.VECTORSTORE_PATH, embeddings))]
+        vectorstore = FAISS.from_texts(
+            [d.page_content for d in docs],
+            embeddings,
+            metadatas=[d.metadata for d in docs],
+        )
+        categories, centroids = category_centroids(vectorstore)
+        if args.embeddings == "stub":
+            embeddings.latency_ms = args.embed_ms
+        resources.override(embeddings=embeddings, vectorstore=vectorstore)
+    else:
+        # Routing is judged on the centroids agents.shards serves
+        manifest = load_manifest(Path(resources.VECTORSTORE_PATH))
+        categories = list(manifest)
+        centroids = np.array([manifest[c]["centroid"] for c in categories], dtype=np.float32)
+
+    report = {
+        "meta": {
+            "embeddings": args.embeddings,
+            "embed_ms": args.embed_ms if args.embeddings == "stub" else None,
+            "documents": len(resources.get_vectorstore().index_to_docstore_id),
+        },
+        "vector": evaluate(agents, vector_retrieve, queries, key_by_hash),
+        "hybrid": evaluate(agents, hybrid_retrieve, queries, key_by_hash),
+    }
+    if len(categories) > 1:
+        report["routing"] = evaluate_routing(
+            resources.get_embeddings(), queries, category_by_hash, categories, centroids
+        )
+
+    k = agents.RETRIEVER_K
+    for name in ("vector", "hybrid"):
+        r = report[name]
+        print(
+            f"{name:<7} recall@1 {r['recall@1']:.3f}  recall@{k} {r[f'recall@{k}']:.3f}  "
+            f"mrr {r['mrr']:.3f}  p50 {r['p50_ms']:>8.2f} ms  p95 {r['p95_ms']:>8.2f} ms  "
+            f"embed calls {r['embed_calls']}/{r['queries']}  duplicates {r['duplicate_results']}"
+        )
+
+    if "routing" in report:
+        r = report["routing"]
+        print(
+            f"\nShard routing (min similarity {r['min_similarity']}): best cosine p5/p50/p95 "
+            f"{r['best_similarity_p5_p50_p95']}, margin p5/p50/p95 {r['margin_p5_p50_p95']}"
+        )
+        for row in r["sweep"]:
+            accuracy = "-" if row["accuracy"] is None else f"{row['accuracy']:.3f}"
+            print(f"  margin {row['margin']:<5} coverage {row['coverage']:.3f}  accuracy {accuracy}")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport saved to: {args.output.resolve()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""Per-route precision of the pre-router on labelled queries.
+
+Every query in the labelled set names the route it should take. The
+keyword rules and the nearest-centroid stage (``agents.pre_router``) are
+scored separately: for each route, how many queries the stage answered
+(coverage), how many of those were right (precision) and how many of the
+route's queries it caught (recall). A query the stage does not answer goes
+to the LLM router, so a wrong answer costs more than no answer.
+
+The centroid stage is also swept over thresholds and margins so
+PRE_ROUTER_CENTROID_THRESHOLD / PRE_ROUTER_CENTROID_MARGIN can be picked
+from the numbers. The labelled queries are held out from the examples the
+centroids are fitted on. ``--embeddings gemini`` needs GOOGLE_API_KEY; the
+stub and local backends only check the mechanics offline, their cosines
+say nothing about Gemini's.
+
+Usage (from the repo root):
+
+    python -m benchmarks.routing_bench
+    python -m benchmarks.routing_bench --embeddings gemini --queries labelled.jsonl
+"""
+import argparse
+import json
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent / "ingestion"))
+
+from benchmarks.stubs import StubEmbeddings
+
+DEFAULT_QUERIES = Path("benchmarks/fixtures/routing_queries.jsonl")
+DEFAULT_OUTPUT = Path("benchmarks/results/routing.json")
+
+THRESHOLDS = (0.5, 0.6, 0.7, 0.8, 0.85, 0.9)
+MARGINS = (0.0, 0.02, 0.04, 0.08)
+
+
+def load_queries(path: Path) -> List[Tuple[str, str]]:
+    """One JSON object per line with "query" and "route" fields"""
+    with open(path, encoding="utf-8") as f:
+        return [(item["query"], item["route"]) for item in map(json.loads, filter(str.strip, f))]
+
+
+# --------------------------------------------------
+# SCORING
+# --------------------------------------------------
+def score(predictions: List[Optional[str]], labels: List[str]) -> dict:
+    """Coverage and accuracy overall, precision and recall per route"""
+    answered = [(p, l) for p, l in zip(predictions, labels) if p is not None]
+    correct = sum(p == l for p, l in answered)
+    predicted = Counter(p for p, _ in answered)
+    right = Counter(p for p, l in answered if p == l)
+    totals = Counter(labels)
+
+    return {
+        "coverage": round(len(answered) / len(labels), 4),
+        "accuracy": round(correct / len(answered), 4) if answered else None,
+        "routes": {
+            route: {
+                "queries": totals[route],
+                "answered": predicted[route],
+                "precision": round(right[route] / predicted[route], 4) if predicted[route] else None,
+                "recall": round(right[route] / totals[route], 4),
+            }
+            for route in sorted(totals)
+        },
+    }
+
+
+def centroid_sweep(classifier, vectors: np.ndarray, labels: List[str]) -> List[dict]:
+    """Coverage and accuracy of the centroid stage per threshold and margin"""
+    sims = vectors @ classifier.centroids.T
+    order = np.argsort(sims, axis=1)[:, ::-1]
+    rows = np.arange(len(sims))
+    best, second = sims[rows, order[:, 0]], sims[rows, order[:, 1]]
+    correct = np.array([classifier.labels[i] == l for i, l in zip(order[:, 0], labels)])
+
+    sweep = []
+    for threshold in THRESHOLDS:
+        for margin in MARGINS:
+            routed = (best >= threshold) & (best - second >= margin)
+            sweep.append({
+                "threshold": threshold,
+                "margin": margin,
+                "coverage": round(float(routed.mean()), 4),
+                "accuracy": round(float(correct[routed].mean()), 4) if routed.any() else None,
+            })
+    return sweep
+
+
+def print_stage(name: str, result: dict):
+    accuracy = "-" if result["accuracy"] is None else f"{result['accuracy']:.3f}"
+    print(f"{name:<9} coverage {result['coverage']:.3f}  accuracy {accuracy}")
+    for route, r in result["routes"].items():
+        precision = "-" if r["precision"] is None else f"{r['precision']:.3f}"
+        print(
+            f"  {route:<9} precision {precision:>5}  recall {r['recall']:.3f}  "
+            f"answered {r['answered']}/{r['queries']}"
+        )
+
+
+# --------------------------------------------------
+# MAIN
+# --------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--queries", type=Path, default=DEFAULT_QUERIES)
+    parser.add_argument("--embeddings", choices=["stub", "local", "gemini"], default="stub")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    from agents.pre_router import CENTROID_MARGIN, CENTROID_THRESHOLD, CentroidClassifier, classify_rules
+    from embedding_backends import get_embeddings_backend
+
+    queries = load_queries(args.queries)
+    texts = [q for q, _ in queries]
+    labels = [route for _, route in queries]
+
+    if args.embeddings == "stub":
+        embeddings = StubEmbeddings(latency_ms=0)
+    else:
+        embeddings = get_embeddings_backend(args.embeddings)
+    classifier = CentroidClassifier(embeddings)
+    classifier.fit()
+
+    vectors = np.array([embeddings.embed_query(t) for t in texts], dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    rules = [classify_rules(t) for t in texts]
+    centroid = [classifier._nearest(v) for v in vectors]
+    # What pre_route answers: the rules first, then the centroids
+    combined = [r or c for r, c in zip(rules, centroid)]
+
+    best = (vectors @ classifier.centroids.T).max(axis=1)
+    report = {
+        "meta": {
+            "embeddings": args.embeddings,
+            "queries": len(queries),
+            "threshold": CENTROID_THRESHOLD,
+            "margin": CENTROID_MARGIN,
+            "best_similarity_p5_p50_p95": np.percentile(best, [5, 50, 95]).round(4).tolist(),
+        },
+        "rules": score([r and r.route for r in rules], labels),
+        "centroid": score([c and c.route for c in centroid], labels),
+        "combined": score([c and c.route for c in combined], labels),
+        "centroid_sweep": centroid_sweep(classifier, vectors, labels),
+    }
+
+    print(
+        f"{len(queries)} queries, {args.embeddings} embeddings, threshold {CENTROID_THRESHOLD}, "
+        f"margin {CENTROID_MARGIN}, best cosine p5/p50/p95 {report['meta']['best_similarity_p5_p50_p95']}\n"
+    )
+    for name in ("rules", "centroid", "combined"):
+        print_stage(name, report[name])
+    print("\nCentroid sweep (threshold / margin):")
+    for row in report["centroid_sweep"]:
+        accuracy = "-" if row["accuracy"] is None else f"{row['accuracy']:.3f}"
+        print(f"  {row['threshold']:<5} {row['margin']:<5} coverage {row['coverage']:.3f}  accuracy {accuracy}")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport saved to: {args.output.resolve()}")
+
+
+if __name__ == "__main__":
+    main()
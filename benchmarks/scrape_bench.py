@@ -0,0 +1,136 @@
+"""Throughput and peak memory of the scrape_faq HTML parsers.
+
+Runs every SCRAPE_PARSER engine over the same saved pages, reports pages
+per second and peak traced memory, and checks that each engine serializes
+to exactly the same faqs.jsonl bytes as ``legacy``.
+
+Pages come from ``benchmarks/fixtures/faq_pages/`` (``<slug>.html``, as in
+https://www.jashanmal.com/pages/<slug>) or, with ``--from-cache``, from the
+bodies the scraper saved in its HTTP cache.
+
+Usage (from the repo root):
+
+    python -m benchmarks.scrape_bench
+    python -m benchmarks.scrape_bench --repeat 50 --from-cache
+"""
+import argparse
+import hashlib
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "ingestion"))
+
+import scrape_faq
+from crawler import HTTP_CACHE_DIR
+from records import dumps_record
+
+FIXTURES_DIR = Path("benchmarks/fixtures/faq_pages")
+SITE_PAGES = "https://www.jashanmal.com/pages/"
+ENGINES = ("legacy", "strained")
+DEFAULT_OUTPUT = Path("benchmarks/results/scrape.json")
+
+
+# --------------------------------------------------
+# PAGES
+# --------------------------------------------------
+def load_fixtures(directory: Path):
+    return [
+        (SITE_PAGES + path.stem, path.read_text(encoding="utf-8"))
+        for path in sorted(directory.glob("*.html"))
+    ]
+
+
+def load_cached(directory: Path):
+    pages = []
+    for path in sorted(directory.glob("*.json")):
+        with open(path, encoding="utf-8") as f:
+            entry = json.load(f)
+        pages.append((entry["url"], entry["body"]))
+    return pages
+
+
+# --------------------------------------------------
+# MEASUREMENT
+# --------------------------------------------------
+def scrape(pages) -> bytes:
+    """faqs.jsonl exactly as scrape_faq.main() writes it"""
+    lines = []
+    for url, html in pages:
+        docs = scrape_faq.parse_page(scrape_faq.page_name_for(url), html, url)
+        lines.extend(dumps_record(d) for d in docs)
+    return "".join(lines).encode("utf-8")
+
+
+def run_engine(engine: str, pages, repeat: int) -> dict:
+    scrape_faq.SCRAPE_PARSER = engine
+
+    # Peak memory of a single pass; tracing would distort the timings
+    tracemalloc.start()
+    output = scrape(pages)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        scrape(pages)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "engine": engine,
+        "pages_per_s": round(len(pages) * repeat / elapsed, 1),
+        "ms_per_page": round(elapsed * 1000 / (len(pages) * repeat), 3),
+        "peak_mb": round(peak / 1e6, 2),
+        "output_sha256": hashlib.sha256(output).hexdigest(),
+        "output_bytes": len(output),
+    }
+
+
+# --------------------------------------------------
+# MAIN
+# --------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES_DIR)
+    parser.add_argument("--from-cache", action="store_true", help=f"Use pages saved in {HTTP_CACHE_DIR}")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=ENGINES)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    pages = load_cached(HTTP_CACHE_DIR) if args.from_cache else load_fixtures(args.fixtures)
+    if not pages:
+        raise SystemExit("No pages to parse")
+    size = sum(len(html) for _, html in pages)
+    print(f"{len(pages)} pages, {size / 1e3:.0f} kB of HTML, {args.repeat} passes\n")
+
+    original = scrape_faq.SCRAPE_PARSER
+    results = [run_engine(engine, pages, args.repeat) for engine in args.engines]
+    scrape_faq.SCRAPE_PARSER = original
+
+    reference = results[0]["output_sha256"]
+    for row in results:
+        row["identical"] = row["output_sha256"] == reference
+        print(
+            f"{row['engine']:<10} {row['pages_per_s']:>8.1f} pages/s  "
+            f"{row['ms_per_page']:>8.3f} ms/page  peak {row['peak_mb']:>6.2f} MB  "
+            f"output {'identical' if row['identical'] else 'DIFFERS'}"
+        )
+
+    report = {
+        "meta": {"pages": len(pages), "html_bytes": size, "repeat": args.repeat, "from_cache": args.from_cache},
+        "results": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport saved to: {args.output.resolve()}")
+
+    if not all(row["identical"] for row in results):
+        raise SystemExit("Parsers disagree on faqs.jsonl")
+
+
+if __name__ == "__main__":
+    main()
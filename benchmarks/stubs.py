@@ -0,0 +1,188 @@
+"""Deterministic offline stand-ins for Gemini and Google Calendar.
+
+Each stub sleeps for a configurable amount of time to mimic the network
+latency of the real service, so the agent can be benchmarked without an
+API key and without noise from the remote side.
+"""
+import asyncio
+import hashlib
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+import numpy as np
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_WORD_RE = re.compile(r"\w+")
+
+STUB_ANSWER = (
+    "Thanks for reaching out! Based on our help content, here is what you "
+    "need to know. Please let me know if there is anything else I can help "
+    "you with today."
+)
+
+
+def _prompt_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(str(m.content) for m in messages)
+
+
+class StubChatModel(BaseChatModel):
+    """Chat model with a fixed time-to-first-token and per-token delay"""
+
+    ttft_ms: float = 300.0
+    token_ms: float = 10.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-chat"
+
+    def _reply(self, prompt: str) -> str:
+        # The router prompt asks for a single word
+        if "Return ONLY one word." in prompt:
+            query = prompt.rsplit("Query:", 1)[-1].lower()
+            if "weather" in query or "joke" in query:
+                return "fallback"
+            return "rag"
+        return STUB_ANSWER
+
+    def _tokens(self, text: str) -> List[str]:
+        return re.findall(r"\S+\s*", text)
+
+    def _usage(self, prompt: str, reply: str) -> dict:
+        inp = len(prompt) // 4
+        out = len(self._tokens(reply))
+        return {"input_tokens": inp, "output_tokens": out, "total_tokens": inp + out}
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        prompt = _prompt_text(messages)
+        reply = self._reply(prompt)
+        time.sleep((self.ttft_ms + self.token_ms * len(self._tokens(reply))) / 1000)
+        message = AIMessage(content=reply, usage_metadata=self._usage(prompt, reply))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        prompt = _prompt_text(messages)
+        reply = self._reply(prompt)
+        await asyncio.sleep((self.ttft_ms + self.token_ms * len(self._tokens(reply))) / 1000)
+        message = AIMessage(content=reply, usage_metadata=self._usage(prompt, reply))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        prompt = _prompt_text(messages)
+        reply = self._reply(prompt)
+        tokens = self._tokens(reply)
+        time.sleep(self.ttft_ms / 1000)
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self.token_ms / 1000)
+            usage = self._usage(prompt, reply) if i == len(tokens) - 1 else None
+            chunk = ChatGenerationChunk(
+                message=AIMessageChunk(content=token, usage_metadata=usage)
+            )
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        prompt = _prompt_text(messages)
+        reply = self._reply(prompt)
+        tokens = self._tokens(reply)
+        await asyncio.sleep(self.ttft_ms / 1000)
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(self.token_ms / 1000)
+            usage = self._usage(prompt, reply) if i == len(tokens) - 1 else None
+            chunk = ChatGenerationChunk(
+                message=AIMessageChunk(content=token, usage_metadata=usage)
+            )
+            yield chunk
+
+
+class StubEmbeddings(Embeddings):
+    """Feature-hashed bag-of-words vectors with injected latency.
+
+    ``calls`` counts embedding requests, as the API would bill them.
+    """
+
+    def __init__(self, dim: int = 768, latency_ms: float = 80.0):
+        self.dim = dim
+        self.latency_ms = latency_ms
+        self.calls = 0
+
+    def _vector(self, text: str) -> List[float]:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for word in _WORD_RE.findall(text.lower()):
+            digest = hashlib.md5(word.encode("utf-8")).digest()
+            vec[int.from_bytes(digest[:4], "little") % self.dim] += 1.0
+        norm = np.linalg.norm(vec)
+        if norm:
+            vec /= norm
+        else:
+            vec[0] = 1.0
+        return vec.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        time.sleep(self.latency_ms / 1000)
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.calls += 1
+        time.sleep(self.latency_ms / 1000)
+        return self._vector(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        self.calls += 1
+        await asyncio.sleep(self.latency_ms / 1000)
+        return self._vector(text)
+
+
+class StubCalendar:
+    """Calendar service returning fixed slots"""
+
+    def __init__(self, latency_ms: float = 200.0):
+        self.latency_ms = latency_ms
+
+    def get_available_slots(self, days_ahead: int = 7, **kwargs) -> List[dict]:
+        time.sleep(self.latency_ms / 1000)
+        return [
+            {
+                "start": f"2030-01-0{day}T09:00:00+00:00",
+                "end": f"2030-01-0{day}T09:30:00+00:00",
+                "display": f"Day {day} at 09:00 AM",
+            }
+            for day in range(1, 6)
+        ]
+
+    def create_meeting(self, **kwargs) -> Optional[str]:
+        time.sleep(self.latency_ms / 1000)
+        return "https://calendar.example/stub-event"
@@ -0,0 +1,454 @@
+"""SQLite-backed LangGraph checkpointer.
+
+Replaces the in-process ``MemorySaver`` so conversation checkpoints
+survive restarts and memory stays flat under long-running load:
+
+- WAL journal mode, so readers don't block the writer
+- writes are buffered and committed in batches: when a batch fills, at
+  the end of each turn (``agents.astream``), from a background timer
+  every ``flush_seconds``, before any read (so callers always see their
+  own writes), at exit and on SIGTERM
+- only the last ``keep_last`` checkpoints of each thread are kept
+- threads idle for longer than ``ttl_seconds`` are pruned
+"""
+import asyncio
+import atexit
+import os
+import random
+import signal
+import sqlite3
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+# --------------------------------------------------
+# CONFIG
+# --------------------------------------------------
+CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", "data/checkpoints.sqlite")
+CHECKPOINT_KEEP_LAST = int(os.getenv("CHECKPOINT_KEEP_LAST", "10"))
+CHECKPOINT_TTL_SECONDS = float(os.getenv("CHECKPOINT_TTL_SECONDS", str(7 * 24 * 3600)))
+CHECKPOINT_BATCH_SIZE = int(os.getenv("CHECKPOINT_BATCH_SIZE", "32"))
+CHECKPOINT_FLUSH_SECONDS = float(os.getenv("CHECKPOINT_FLUSH_SECONDS", "1.0"))
+CHECKPOINT_PRUNE_INTERVAL = float(os.getenv("CHECKPOINT_PRUNE_INTERVAL", "600"))
+
+SCHEMA_PATH = Path(__file__).parent / "schema.sql"
+
+# Open checkpointers, closed by the SIGTERM handler
+_instances: "weakref.WeakSet[SQLiteCheckpointer]" = weakref.WeakSet()
+_sigterm_installed = False
+
+
+def _install_sigterm_handler():
+    """Close every checkpointer on SIGTERM, then hand the signal on.
+
+    atexit does not run when a process is killed by the signal, so buffered
+    writes would be lost. Signal handlers can only be set from the main
+    thread; elsewhere this is a no-op.
+    """
+    global _sigterm_installed
+    if _sigterm_installed or threading.current_thread() is not threading.main_thread():
+        return
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def handler(signum, frame):
+        for checkpointer in list(_instances):
+            checkpointer.close()
+        if callable(previous):
+            previous(signum, frame)
+        else:
+            signal.signal(signum, previous if previous is not None else signal.SIG_DFL)
+            os.kill(os.getpid(), signum)
+
+    signal.signal(signal.SIGTERM, handler)
+    _sigterm_installed = True
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver):
+    """LangGraph checkpoint saver storing checkpoints in one SQLite file"""
+
+    def __init__(
+        self,
+        path: str = CHECKPOINT_DB_PATH,
+        keep_last: int = CHECKPOINT_KEEP_LAST,
+        ttl_seconds: float = CHECKPOINT_TTL_SECONDS,
+        batch_size: int = CHECKPOINT_BATCH_SIZE,
+        flush_seconds: float = CHECKPOINT_FLUSH_SECONDS,
+        prune_interval: float = CHECKPOINT_PRUNE_INTERVAL,
+    ):
+        super().__init__()
+        self.path = path
+        self.keep_last = max(1, keep_last)
+        self.ttl_seconds = ttl_seconds
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.prune_interval = prune_interval
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        # Buffered (sql, params) statements and the threads they touch
+        self._pending: List[Tuple[str, tuple]] = []
+        self._dirty_threads = set()
+        self._last_flush = time.monotonic()
+        self._last_prune = time.monotonic()
+        # Flushes what a quiet period leaves buffered; started on first write
+        self._flusher: Optional[threading.Thread] = None
+        self._closed = threading.Event()
+
+        atexit.register(self.close)
+        _instances.add(self)
+        _install_sigterm_handler()
+
+    # ---------------- connection ----------------
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Connection, opened on first use"""
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    if self.path != ":memory:":
+                        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+                    conn = sqlite3.connect(self.path, check_same_thread=False)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute("PRAGMA synchronous=NORMAL")
+                    conn.executescript(SCHEMA_PATH.read_text(encoding="utf-8"))
+                    self._conn = conn
+        return self._conn
+
+    def close(self):
+        self._closed.set()
+        with self._lock:
+            # flush() opens the connection if writes are still buffered
+            self.flush()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ---------------- batching ----------------
+    def _queue(self, thread_id: str, sql: str, params: tuple):
+        with self._lock:
+            self._pending.append((sql, params))
+            self._dirty_threads.add(thread_id)
+            if (
+                len(self._pending) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_seconds
+            ):
+                self.flush()
+            elif self._flusher is None or self._closed.is_set():
+                # First write, or the first since close()
+                self._closed = threading.Event()
+                self._flusher = threading.Thread(
+                    target=self._flush_loop, args=(self._closed,),
+                    name="checkpoint-flush", daemon=True,
+                )
+                self._flusher.start()
+
+    def _flush_loop(self, closed: threading.Event):
+        while not closed.wait(self.flush_seconds):
+            if self._pending:
+                self.flush()
+
+    def flush(self):
+        """Commit buffered writes, then apply the retention policy"""
+        with self._lock:
+            if not self._pending:
+                return
+            now = time.time()
+            conn = self.conn
+            with conn:
+                for sql, params in self._pending:
+                    conn.execute(sql, params)
+                for thread_id in self._dirty_threads:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO threads (thread_id, updated_at) VALUES (?, ?)",
+                        (thread_id, now),
+                    )
+                    self._compact(thread_id)
+            self._pending.clear()
+            self._dirty_threads.clear()
+            self._last_flush = time.monotonic()
+
+            if time.monotonic() - self._last_prune >= self.prune_interval:
+                self.prune_idle()
+
+    def _compact(self, thread_id: str):
+        """Drop all but the newest keep_last checkpoints of a thread"""
+        conn = self.conn
+        namespaces = conn.execute(
+            "SELECT DISTINCT checkpoint_ns FROM checkpoints WHERE thread_id = ?",
+            (thread_id,),
+        ).fetchall()
+        for (ns,) in namespaces:
+            row = conn.execute(
+                "SELECT checkpoint_id FROM checkpoints"
+                " WHERE thread_id = ? AND checkpoint_ns = ?"
+                " ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?",
+                (thread_id, ns, self.keep_last - 1),
+            ).fetchone()
+            if row is None:
+                continue
+            for table in ("checkpoints", "writes"):
+                conn.execute(
+                    f"DELETE FROM {table}"
+                    " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?",
+                    (thread_id, ns, row[0]),
+                )
+
+    # ---------------- pruning ----------------
+    def prune_idle(self, ttl_seconds: Optional[float] = None) -> int:
+        """Delete threads not written to for ttl_seconds; returns how many"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        cutoff = time.time() - ttl
+        with self._lock:
+            conn = self.conn
+            idle = [
+                r[0] for r in conn.execute(
+                    "SELECT thread_id FROM threads WHERE updated_at < ?", (cutoff,)
+                )
+            ]
+            with conn:
+                for thread_id in idle:
+                    self._delete(thread_id)
+            self._last_prune = time.monotonic()
+        if idle:
+            print(f"Pruned {len(idle)} idle checkpoint threads")
+        return len(idle)
+
+    def _delete(self, thread_id: str):
+        for table in ("checkpoints", "writes", "threads"):
+            self.conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete every checkpoint and write of a thread"""
+        with self._lock:
+            self.flush()
+            with self.conn:
+                self._delete(thread_id)
+
+    def thread_count(self) -> int:
+        with self._lock:
+            self.flush()
+            return self.conn.execute("SELECT COUNT(*) FROM threads").fetchone()[0]
+
+    # ---------------- BaseCheckpointSaver ----------------
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, blob = self.serde.dumps_typed(checkpoint)
+        meta_type, meta_blob = self.serde.dumps_typed(
+            get_checkpoint_metadata(config, metadata)
+        )
+        self._queue(
+            thread_id,
+            "INSERT OR REPLACE INTO checkpoints"
+            " (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id,"
+            "  type, checkpoint, metadata_type, metadata)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                thread_id, checkpoint_ns, checkpoint["id"],
+                config["configurable"].get("checkpoint_id"),
+                type_, blob, meta_type, meta_blob,
+            ),
+        )
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # Special channels (errors, interrupts) overwrite; regular writes
+        # are only stored once per task/index
+        verb = "REPLACE" if all(c in WRITES_IDX_MAP for c, _ in writes) else "IGNORE"
+        for idx, (channel, value) in enumerate(writes):
+            type_, blob = self.serde.dumps_typed(value)
+            self._queue(
+                thread_id,
+                f"INSERT OR {verb} INTO writes"
+                " (thread_id, checkpoint_ns, checkpoint_id, task_id, idx,"
+                "  channel, type, value, task_path)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id, checkpoint_ns, checkpoint_id, task_id,
+                    WRITES_IDX_MAP.get(channel, idx), channel, type_, blob, task_path,
+                ),
+            )
+
+    def _tuple(self, row) -> CheckpointTuple:
+        (thread_id, checkpoint_ns, checkpoint_id, parent_id,
+         type_, blob, meta_type, meta_blob) = row
+        writes = self.conn.execute(
+            "SELECT task_id, channel, type, value FROM writes"
+            " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?"
+            " ORDER BY task_path, task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=self.serde.loads_typed((type_, blob)),
+            metadata=self.serde.loads_typed((meta_type, meta_blob)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_id,
+                    }
+                }
+                if parent_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((t, v)))
+                for task_id, channel, t, v in writes
+            ],
+        )
+
+    _COLUMNS = (
+        "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id,"
+        " type, checkpoint, metadata_type, metadata FROM checkpoints"
+    )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        with self._lock:
+            self.flush()
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self.conn.execute(
+                    self._COLUMNS
+                    + " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self.conn.execute(
+                    self._COLUMNS
+                    + " WHERE thread_id = ? AND checkpoint_ns = ?"
+                    " ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            return self._tuple(row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        where, params = [], []
+        if config:
+            where.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if "checkpoint_ns" in config["configurable"]:
+                where.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if checkpoint_id := get_checkpoint_id(config):
+                where.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            where.append("checkpoint_id < ?")
+            params.append(before_id)
+
+        sql = self._COLUMNS
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY checkpoint_id DESC"
+
+        with self._lock:
+            self.flush()
+            rows = self.conn.execute(sql, params).fetchall()
+            results = []
+            for row in rows:
+                item = self._tuple(row)
+                if filter and not all(item.metadata.get(k) == v for k, v in filter.items()):
+                    continue
+                results.append(item)
+                if limit is not None and len(results) >= limit:
+                    break
+        yield from results
+
+    # ---------------- async (SQLite is local; run in a worker thread) ----------------
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
@@ -0,0 +1,127 @@
+"""Batched, concurrent, rate-limited embedding of many documents.
+
+``embed_batched`` splits the texts into batches, sends them from a bounded
+thread pool, keeps the request rate under a token bucket, retries
+transient failures with exponential backoff and full jitter, and prints
+progress. Results come back in input order.
+"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Sequence, Tuple, Type
+
+# --------------------------------------------------
+# CONFIG
+# --------------------------------------------------
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "100"))  # API maximum per request
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "4"))
+EMBED_REQUESTS_PER_MINUTE = float(os.getenv("EMBED_REQUESTS_PER_MINUTE", "300"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "6"))
+EMBED_BACKOFF_SECONDS = float(os.getenv("EMBED_BACKOFF_SECONDS", "1.0"))
+EMBED_BACKOFF_MAX_SECONDS = float(os.getenv("EMBED_BACKOFF_MAX_SECONDS", "60"))
+
+
+class TokenBucket:
+    """Allows ``rate`` acquisitions per second with bursts up to ``capacity``"""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def with_retries(
+    fn: Callable,
+    retryable: Tuple[Type[BaseException], ...],
+    max_retries: int = EMBED_MAX_RETRIES,
+    base_delay: float = EMBED_BACKOFF_SECONDS,
+    max_delay: float = EMBED_BACKOFF_MAX_SECONDS,
+):
+    """Call ``fn()``, retrying ``retryable`` errors with exponential backoff"""
+    for attempt in range(max_retries + 1):
+        try:
+            return fn()
+        except retryable as e:
+            if attempt == max_retries:
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            print(f"⚠️ {type(e).__name__}: {e} — retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+class _Progress:
+    def __init__(self, total: int, label: str, every_seconds: float = 2.0):
+        self.total = total
+        self.label = label
+        self.every_seconds = every_seconds
+        self.done = 0
+        self.start = self.last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, n: int):
+        with self._lock:
+            self.done += n
+            now = time.monotonic()
+            if self.done < self.total and now - self.last < self.every_seconds:
+                return
+            self.last = now
+            elapsed = now - self.start
+            rate = self.done / elapsed if elapsed else 0.0
+            eta = (self.total - self.done) / rate if rate else 0.0
+            print(
+                f"{self.label}: {self.done}/{self.total} "
+                f"({self.done / self.total:.0%}) {rate:.1f}/s, ETA {eta:.0f}s"
+            )
+
+
+def embed_batched(
+    texts: Sequence[str],
+    embed_batch: Callable[[List[str]], List[List[float]]],
+    retryable: Tuple[Type[BaseException], ...] = (),
+    batch_size: int = EMBED_BATCH_SIZE,
+    workers: int = EMBED_WORKERS,
+    requests_per_minute: float = EMBED_REQUESTS_PER_MINUTE,
+    label: str = "Embedded",
+) -> List[List[float]]:
+    """Embed ``texts`` with ``embed_batch`` (one API request per batch)"""
+    if not texts:
+        return []
+
+    batches = [list(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)]
+    bucket = TokenBucket(requests_per_minute / 60, capacity=workers)
+    progress = _Progress(len(texts), label)
+
+    def run(batch: List[str]) -> List[List[float]]:
+        def call():
+            bucket.acquire()
+            return embed_batch(batch)
+
+        vectors = with_retries(call, retryable)
+        if len(vectors) != len(batch):
+            raise ValueError(f"Expected {len(batch)} embeddings, got {len(vectors)}")
+        progress.add(len(batch))
+        return vectors
+
+    if len(batches) == 1 or workers <= 1:
+        results = [run(b) for b in batches]
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embed") as pool:
+            results = list(pool.map(run, batches))
+
+    return [vector for batch in results for vector in batch]
@@ -0,0 +1,139 @@
+"""Local BM25 index over the FAQ records.
+
+Built next to the FAISS index by build_index.py from the same documents.
+Lexical search needs no embedding call, so the retriever uses it to answer
+queries with a clear keyword match on its own and fuses it with FAISS
+(reciprocal rank fusion) otherwise.
+"""
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# --------------------------------------------------
+# CONFIG
+# --------------------------------------------------
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i if in is it me my "
+    "of on or our please the to we what when where which who why will with "
+    "you your".split()
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords, with plural "s" stripped"""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    """Inverted index with Okapi BM25 scoring"""
+
+    def __init__(self, docs: List[dict], postings: Dict[str, List[Tuple[int, int]]], doc_len: List[int]):
+        # docs: {"page_content": ..., "metadata": {...}}
+        self.docs = docs
+        self.postings = postings
+        self.doc_len = doc_len
+        self.avg_len = sum(doc_len) / max(len(doc_len), 1)
+        n = len(docs)
+        self.idf = {
+            term: math.log(1 + (n - len(plist) + 0.5) / (len(plist) + 0.5))
+            for term, plist in postings.items()
+        }
+        # Terms the corpus has never seen weigh as much as the rarest term
+        self.unseen_idf = math.log(1 + (n + 0.5) / 0.5)
+
+    @classmethod
+    def build(cls, docs: List[dict]) -> "BM25Index":
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        doc_len = []
+        for i, doc in enumerate(docs):
+            tokens = tokenize(doc["page_content"])
+            doc_len.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings[term].append((i, tf))
+        return cls(docs, dict(postings), doc_len)
+
+    # ---------------- persistence ----------------
+    def save(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"docs": self.docs, "postings": self.postings, "doc_len": self.doc_len},
+                f,
+                ensure_ascii=False,
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        postings = {t: [tuple(p) for p in plist] for t, plist in data["postings"].items()}
+        return cls(data["docs"], postings, data["doc_len"])
+
+    # ---------------- search ----------------
+    def search(self, query: str, k: int = 5) -> List[Tuple[int, float]]:
+        """Top ``k`` (doc index, score) pairs, best first"""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self.postings[term]:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len[i] / self.avg_len)
+                scores[i] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda x: x[1], reverse=True)[:k]
+
+    def coverage(self, query: str, doc_index: int) -> float:
+        """IDF-weighted share of the query's terms that occur in a document"""
+        terms = set(tokenize(query))
+        if not terms:
+            return 0.0
+        total = matched = 0.0
+        for term in terms:
+            idf = self.idf.get(term, self.unseen_idf)
+            total += idf
+            if any(i == doc_index for i, _ in self.postings.get(term, ())):
+                matched += idf
+        return matched / total
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked ID lists: score(id) = sum of 1 / (k + rank)"""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda x: x[1], reverse=True)
+
+
+def load_or_build(path: Path, records_path: Optional[Path] = None) -> BM25Index:
+    """Load the saved index; rebuild it from the records if it is missing"""
+    if Path(path).exists():
+        return BM25Index.load(path)
+    if records_path is None:
+        raise FileNotFoundError(path)
+
+    from records import load_records, record_metadata, record_text
+
+    print(f"BM25 index not found at {path}, building it from {records_path}")
+    docs = [
+        {"page_content": record_text(r), "metadata": record_metadata(r)}
+        for r in load_records(records_path)
+    ]
+    return BM25Index.build(docs)
@@ -1,59 +1,354 @@
+import argparse
 import json
+import os
+import re
+import shutil
+from collections import Counter, defaultdict
 from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
 from dotenv import load_dotenv
 
 from langchain_core.documents import Document
 from langchain_community.vectorstores import FAISS
-from gemini_embeddings import GeminiEmbeddings
+from bm25 import BM25Index
+from embedding_backends import (
+    IndexMismatchError,
+    check_index_meta,
+    get_embeddings_backend,
+    read_index_meta,
+    write_index_meta,
+)
+from embedding_store import EmbeddingStore
+from index_store import IndexWriter, iter_indexed, load_index
+from index_variants import (
+    INDEX_TYPE,
+    apply_search_params,
+    is_exact_flat,
+    new_index,
+    resolve,
+    training_points,
+)
+from records import batched, iter_records, record_metadata, record_text
 
 load_dotenv()
 
 # -----------------------------
 # PATHS
 # -----------------------------
-INPUT_FILE = Path("data/processed/faqs.json")
+INPUT_FILE = Path("data/processed/faqs.jsonl")
 INDEX_DIR = Path("data/processed/faiss_index")
+BM25_FILE = Path("data/processed/bm25_index.json")
+
+# Documents embedded and added per step; bounds the builder's memory
+INDEX_BATCH_SIZE = int(os.getenv("INDEX_BATCH_SIZE", "1000"))
+# Vectors IVF / PQ quantizers are trained on (the first ones in the file),
+# raised to what FAISS needs for the index size
+INDEX_TRAIN_SIZE = int(os.getenv("INDEX_TRAIN_SIZE", "50000"))
+# Also write one sub-index per category under <index>/shards/
+SHARD_INDEXES = os.getenv("SHARD_INDEXES", "1") == "1"
+SHARDS_DIR = "shards"
+SHARD_MANIFEST = "manifest.json"
+
 
 # -----------------------------
 # LOAD DATA
 # -----------------------------
-with open(INPUT_FILE, encoding="utf-8") as f:
-    raw_docs = json.load(f)
-
-documents = []
-texts = []
-
-for item in raw_docs:
-    if "question" in item:
-        content = f"Question: {item['question']}\nAnswer: {item['answer']}"
-    else:
-        content = item["text"]
-
-    texts.append(content)
-    documents.append(
-        Document(
-            page_content=content,
-            metadata={
-                "category": item["category"],
-                "source": item["source"],
-            },
+def iter_documents(path: Path = INPUT_FILE) -> Iterator[Document]:
+    for item in iter_records(path):
+        yield Document(page_content=record_text(item), metadata=record_metadata(item))
+
+
+def identity(doc: Document) -> tuple:
+    """What a document is about, independent of its content (page + heading)"""
+    return doc.metadata.get("source"), doc.page_content.split("\n", 1)[0]
+
+
+# -----------------------------
+# EXISTING INDEX
+# -----------------------------
+def load_existing(index_dir: Path, embeddings) -> Optional[FAISS]:
+    """The current index, or None if there is none or it used other embeddings"""
+    if not (index_dir / "index.faiss").exists():
+        return None
+    vectorstore = load_index(index_dir, embeddings)
+    try:
+        check_index_meta(index_dir, embeddings, vectorstore.index.d)
+    except IndexMismatchError as e:
+        print(f"{e}\nDoing a full rebuild.")
+        return None
+    return vectorstore
+
+
+def indexed_documents(vectorstore: FAISS, path: Path = INPUT_FILE) -> Dict[str, tuple]:
+    """content_hash -> (position in the FAISS index, identity)
+
+    Indexes from before content_hash metadata have random IDs; their
+    documents get the hash of the record in ``path`` with the same
+    source and text. Documents matching no record keep their ID, so the
+    diff still counts them as changed or removed.
+    """
+    indexed, legacy = {}, {}
+    for position, doc_id, doc in iter_indexed(vectorstore):
+        if "content_hash" in doc.metadata:
+            indexed[doc.metadata["content_hash"]] = (position, identity(doc))
+        else:
+            legacy[(doc.metadata.get("source"), doc.page_content)] = (doc_id, position, identity(doc))
+
+    if legacy:
+        for doc in iter_documents(path):
+            match = legacy.pop((doc.metadata["source"], doc.page_content), None)
+            if match is not None:
+                indexed[doc.metadata["content_hash"]] = match[1:]
+        for doc_id, position, ident in legacy.values():
+            indexed[doc_id] = (position, ident)
+    return indexed
+
+
+def seed_store(store: EmbeddingStore, model: str, vectorstore: FAISS, indexed: Dict[str, tuple]):
+    """Copy vectors of a flat index into the store so they are never re-embedded.
+
+    ``indexed`` is content_hash -> (position, identity) of the documents
+    to keep.
+    """
+    if not is_exact_flat(vectorstore.index):
+        return
+    for hashes in batched(indexed, INDEX_BATCH_SIZE):
+        known = store.get_many(model, hashes)
+        store.put_many(model, [
+            (h, vectorstore.index.reconstruct(indexed[h][0]).tolist())
+            for h in hashes
+            if h not in known
+        ])
+
+
+# -----------------------------
+# BUILD FAISS INDEX (EMBEDDING_BACKEND: gemini | local, INDEX_TYPE)
+# -----------------------------
+class StreamingIndex:
+    """One index directory filled batch by batch.
+
+    IVF / PQ types hold batches back until enough vectors have arrived
+    to train on; other types take every batch immediately. Also sums
+    the (unit) vectors for the index's centroid.
+    """
+
+    def __init__(self, index_dir: Path, total: int, verbose: bool = False):
+        self.index_dir = index_dir
+        self.total = total
+        self.verbose = verbose
+        self.writer = None
+        self.factory = None
+        self.pending = []
+        self.vector_sum = None
+
+    def add(self, docs: List[Document], matrix: np.ndarray):
+        if self.writer is None:
+            d = matrix.shape[1]
+            self.factory = resolve(INDEX_TYPE, self.total, d)
+            self.writer = IndexWriter(self.index_dir, new_index(d, self.factory))
+            self.train_size = min(self.total, max(INDEX_TRAIN_SIZE, training_points(self.factory, self.total)))
+            self.vector_sum = np.zeros(d, dtype=np.float64)
+        self.vector_sum += matrix.sum(axis=0)
+        self.pending.append((docs, matrix))
+
+        held = sum(len(m) for _, m in self.pending)
+        if self.writer.index.is_trained or held >= self.train_size:
+            self._flush()
+
+    def _flush(self):
+        if not self.writer.index.is_trained:
+            held = np.concatenate([m for _, m in self.pending])
+            print(f"Training {self.factory} on {len(held)} vectors...")
+            self.writer.index.train(held)
+        for docs, m in self.pending:
+            self.writer.add(
+                [d.metadata["content_hash"] for d in docs],
+                [d.page_content for d in docs],
+                [d.metadata for d in docs],
+                m,
+            )
+        self.pending.clear()
+        if self.verbose:
+            print(f"Indexed {self.writer.index.ntotal}/{self.total} documents")
+
+    def centroid(self) -> List[float]:
+        return (self.vector_sum / np.linalg.norm(self.vector_sum)).tolist()
+
+    def close(self, embeddings, **meta) -> dict:
+        if self.pending:
+            self._flush()
+        apply_search_params(self.writer.index)
+        self.writer.close()
+        return write_index_meta(
+            self.index_dir, embeddings, self.writer.index.d,
+            index_type=INDEX_TYPE, factory=self.factory, **meta,
         )
+
+
+def shard_name(category: str) -> str:
+    return re.sub(r"[^\w-]", "_", category) or "_"
+
+
+def build_faiss(path: Path = INPUT_FILE, index_dir: Path = INDEX_DIR, full: bool = False):
+    """Build the index from the records in ``path``, embedding only what changed.
+
+    Records are streamed twice: once to diff them against the current
+    index by content_hash, then in INDEX_BATCH_SIZE batches that are
+    looked up in the embedding store (or embedded and stored) and
+    appended to a new index directory, which replaces the old one when
+    complete. Memory holds one batch, the content hashes and the FAISS
+    index, however large the corpus. ``full`` ignores the existing index
+    and the store.
+
+    With SHARD_INDEXES each category also gets its own index under
+    ``shards/``, with a manifest of document counts and centroids that
+    the agent uses to pick a shard (agents/shards.py).
+    """
+    embeddings = get_embeddings_backend()
+    store = EmbeddingStore()
+    model = f"{embeddings.backend}:{embeddings.model}"
+
+    vectorstore = None if full else load_existing(index_dir, embeddings)
+    indexed = indexed_documents(vectorstore, path) if vectorstore else {}
+
+    # Pass 1: diff against the index
+    current = set()
+    new_identities = []
+    categories = Counter()
+    for doc in iter_documents(path):
+        content_hash = doc.metadata["content_hash"]
+        if content_hash in current:
+            continue
+        current.add(content_hash)
+        categories[doc.metadata["category"]] += 1
+        if content_hash not in indexed:
+            new_identities.append(identity(doc))
+
+    reused = {h: indexed[h] for h in indexed if h in current}
+    if reused:
+        seed_store(store, model, vectorstore, reused)
+
+    gone_identities = {indexed[h][1] for h in indexed if h not in current}
+    changed = sum(i in gone_identities for i in new_identities)
+    print(
+        f"Index diff: {len(new_identities) - changed} added, {changed} changed, "
+        f"{len(indexed) - len(current) + len(new_identities) - changed} removed, "
+        f"{len(current) - len(new_identities)} reused"
+    )
+
+    meta = read_index_meta(index_dir) if vectorstore else {}
+    index_type = meta.get("index_type", "flat")
+    if vectorstore is not None and not new_identities and len(indexed) == len(current):
+        if index_type != INDEX_TYPE:
+            print(f"Index type changes from {index_type} to {INDEX_TYPE}; rebuilding the index")
+        elif SHARD_INDEXES and not meta.get("shards"):
+            print("Adding category shards; rebuilding the index")
+        else:
+            print(f"✓ FAISS index at {index_dir.resolve()} is up to date")
+            return
+    if not current:
+        raise SystemExit(f"No records in {path}")
+    vectorstore = indexed = reused = None  # release the old index before building
+
+    # Pass 2: embed and add batch by batch
+    tmp_dir = index_dir.with_name(f"{index_dir.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    full_index = StreamingIndex(tmp_dir, len(current), verbose=True)
+    shards = {
+        category: StreamingIndex(tmp_dir / SHARDS_DIR / shard_name(category), count)
+        for category, count in categories.items()
+    } if SHARD_INDEXES else {}
+    added = set()
+    embedded = 0
+
+    for batch in batched(iter_documents(path), INDEX_BATCH_SIZE):
+        batch = [d for d in batch if d.metadata["content_hash"] not in added]
+        added.update(d.metadata["content_hash"] for d in batch)
+        if not batch:
+            continue
+
+        hashes = [d.metadata["content_hash"] for d in batch]
+        vectors = {} if full else store.get_many(model, hashes)
+        to_embed = [d for d in batch if d.metadata["content_hash"] not in vectors]
+        if to_embed:
+            new_vectors = embeddings.embed_documents([d.page_content for d in to_embed])
+            pairs = [(d.metadata["content_hash"], v) for d, v in zip(to_embed, new_vectors)]
+            vectors.update(pairs)
+            store.put_many(model, pairs)
+            embedded += len(to_embed)
+        matrix = np.array([vectors[h] for h in hashes], dtype=np.float32)
+
+        full_index.add(batch, matrix)
+        if shards:
+            rows = defaultdict(list)
+            for i, d in enumerate(batch):
+                rows[d.metadata["category"]].append(i)
+            for category, idx in rows.items():
+                shards[category].add([batch[i] for i in idx], matrix[idx])
+
+    print(
+        f"Embedded {embedded} documents with {embeddings.backend} embeddings "
+        f"({len(current) - embedded} from the embedding store)"
+    )
+
+    manifest = {}
+    for category, shard in shards.items():
+        shard.close(embeddings, category=category)
+        manifest[category] = {
+            "dir": shard_name(category),
+            "count": categories[category],
+            "centroid": shard.centroid(),
+        }
+    if shards:
+        with open(tmp_dir / SHARDS_DIR / SHARD_MANIFEST, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        print(f"✓ {len(shards)} category shards: " + ", ".join(f"{c} ({n})" for c, n in categories.items()))
+
+    meta = full_index.close(embeddings, shards=dict(categories) if shards else None)
+    swap_in(tmp_dir, index_dir)
+    print(
+        f"✓ FAISS index saved at: {index_dir.resolve()} "
+        f"({meta['backend']}, dim {meta['dim']}, {meta['factory']})"
     )
 
-print(f"Loaded {len(documents)} documents")
+
+def swap_in(tmp_dir: Path, index_dir: Path):
+    """Replace ``index_dir`` with the finished ``tmp_dir`` using renames.
+
+    A reader never sees a half-written index: it loads either the old one
+    or the new one (or, between the two renames, finds none).
+    """
+    old_dir = index_dir.with_name(f"{index_dir.name}.old-{os.getpid()}")
+    if index_dir.exists():
+        os.replace(index_dir, old_dir)
+    os.replace(tmp_dir, index_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
 
 # -----------------------------
-# BUILD FAISS INDEX WITH GEMINI EMBEDDINGS
+# BUILD BM25 INDEX (SAME DOCUMENTS)
 # -----------------------------
-print("Building FAISS index with Gemini embeddings...")
+def build_bm25(records_path: Path = INPUT_FILE, path: Path = BM25_FILE) -> BM25Index:
+    # The lexical index keeps every document, so it is built in memory
+    index = BM25Index.build(
+        [{"page_content": d.page_content, "metadata": d.metadata} for d in iter_documents(records_path)]
+    )
+    index.save(path)
 
-embeddings = GeminiEmbeddings(model="models/embedding-001")
+    print(f"✓ BM25 index saved at: {path.resolve()} ({len(index.idf)} terms)")
+    return index
 
-vectorstore = FAISS.from_documents(
-    documents=documents,
-    embedding=embeddings
-)
 
-vectorstore.save_local(INDEX_DIR)
+def main():
+    parser = argparse.ArgumentParser(description="Build the FAISS and BM25 indexes")
+    parser.add_argument("--full", action="store_true", help="Re-embed everything from scratch")
+    args = parser.parse_args()
+
+    build_faiss(INPUT_FILE, full=args.full)
+    build_bm25(INPUT_FILE)
+
 
-print(f"✓ FAISS index saved at: {INDEX_DIR.resolve()}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""Concurrent, polite HTTP fetcher with an on-disk conditional-GET cache.
+
+- one pooled ``requests.Session`` (keep-alive, retries on 429/5xx with
+  Retry-After) shared by a bounded thread pool
+- per-host politeness: at most CRAWL_PER_HOST requests in flight and at
+  least CRAWL_HOST_DELAY seconds between request starts to one host
+- ``HttpCache`` keeps each page's ETag / Last-Modified, body and whatever
+  the caller parsed from it, tagged with the caller's parser key; the next
+  fetch is conditional, and on ``304 Not Modified`` the cached parse is
+  reused without re-parsing if the same parser made it
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, NamedTuple, Optional
+from urllib.parse import urldefrag, urljoin, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from records import batched
+
+# --------------------------------------------------
+# CONFIG
+# --------------------------------------------------
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "8"))
+CRAWL_PER_HOST = int(os.getenv("CRAWL_PER_HOST", "2"))
+CRAWL_HOST_DELAY = float(os.getenv("CRAWL_HOST_DELAY", "0.5"))
+CRAWL_TIMEOUT = float(os.getenv("CRAWL_TIMEOUT", "20"))
+HTTP_CACHE_DIR = Path(os.getenv("HTTP_CACHE_DIR", "data/cache/http"))
+
+
+class Page(NamedTuple):
+    url: str
+    status: int  # 200, 304 (served from cache) or the error status
+    html: Optional[str]
+    not_modified: bool
+    parsed: Optional[list]  # cached parse result when not_modified
+
+
+# --------------------------------------------------
+# DISK CACHE
+# --------------------------------------------------
+class HttpCache:
+    """One JSON file per URL: validators, body and the caller's parse result.
+
+    ``parser_key`` names the parser (and its version) whose results are
+    stored; a parse stored under another key is not reused.
+    """
+
+    def __init__(self, directory: Path = HTTP_CACHE_DIR, parser_key: Optional[str] = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.parser_key = parser_key
+
+    def _path(self, url: str) -> Path:
+        return self.directory / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+    def get(self, url: str) -> Optional[dict]:
+        try:
+            with open(self._path(url), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def put(self, url: str, entry: dict):
+        path = self._path(url)
+        tmp = path.with_suffix(f".tmp-{threading.get_ident()}")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"url": url, **entry}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def set_parsed(self, url: str, parsed: list):
+        """Remember what was extracted from the cached body"""
+        entry = self.get(url)
+        if entry is not None:
+            entry["parsed"] = parsed
+            entry["parser"] = self.parser_key
+            self.put(url, entry)
+
+    def parsed(self, entry: Optional[dict]) -> Optional[list]:
+        """The entry's parse result, None if another parser made it"""
+        if entry and entry.get("parser") == self.parser_key:
+            return entry.get("parsed")
+        return None
+
+    def conditional_headers(self, entry: Optional[dict]) -> Dict[str, str]:
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+
+# --------------------------------------------------
+# POLITENESS
+# --------------------------------------------------
+class _HostGate:
+    """Caps in-flight requests and spaces request starts per host"""
+
+    def __init__(self, per_host: int, delay: float):
+        self.per_host = per_host
+        self.delay = delay
+        self._slots: Dict[str, threading.Semaphore] = {}
+        self._next_start: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def __call__(self, host: str):
+        with self._lock:
+            slot = self._slots.setdefault(host, threading.Semaphore(self.per_host))
+        with slot:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start.get(host, now))
+                self._next_start[host] = start + self.delay
+            time.sleep(start - now)
+            yield
+
+
+# --------------------------------------------------
+# FETCHER
+# --------------------------------------------------
+def make_session(pool_size: int, headers: Optional[dict] = None) -> requests.Session:
+    session = requests.Session()
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET", "HEAD"),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+class Fetcher:
+    def __init__(
+        self,
+        headers: Optional[dict] = None,
+        cache: Optional[HttpCache] = None,
+        concurrency: int = CRAWL_CONCURRENCY,
+        per_host: int = CRAWL_PER_HOST,
+        host_delay: float = CRAWL_HOST_DELAY,
+        timeout: float = CRAWL_TIMEOUT,
+    ):
+        self.cache = cache
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.session = make_session(concurrency, headers)
+        self._gate = _HostGate(per_host, host_delay)
+        self.stats = {"fetched": 0, "not_modified": 0, "failed": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def fetch(self, url: str) -> Page:
+        entry = self.cache.get(url) if self.cache else None
+        headers = self.cache.conditional_headers(entry) if self.cache else {}
+
+        try:
+            with self._gate(urlparse(url).netloc):
+                res = self.session.get(url, headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            print(f"  Failed: {url}: {e}")
+            self._count("failed")
+            return Page(url, 0, None, False, None)
+
+        if res.status_code == 304 and entry is not None:
+            self._count("not_modified")
+            return Page(url, 304, entry["body"], True, self.cache.parsed(entry))
+
+        if not res.ok:
+            print(f"  Failed: {url}: HTTP {res.status_code}")
+            self._count("failed")
+            return Page(url, res.status_code, None, False, None)
+
+        self._count("fetched")
+        if self.cache and (res.headers.get("ETag") or res.headers.get("Last-Modified")):
+            self.cache.put(url, {
+                "etag": res.headers.get("ETag"),
+                "last_modified": res.headers.get("Last-Modified"),
+                "body": res.text,
+                "parsed": None,
+            })
+        return Page(url, res.status_code, res.text, False, None)
+
+    def iter_fetch(self, urls: Iterable[str]) -> Iterator[Page]:
+        """Fetch concurrently, yielding pages in the order of ``urls``.
+
+        At most ``concurrency * 4`` pages are in flight or waiting to be
+        consumed, so a long URL list does not pile up in memory.
+        """
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="crawl") as pool:
+            for batch in batched(urls, self.concurrency * 4):
+                yield from pool.map(self.fetch, batch)
+
+    def crawl(
+        self,
+        seeds: Iterable[str],
+        follow: Callable[[str], bool],
+        extract_links: Callable[[str, str], Iterable[str]],
+        max_pages: int = 200,
+    ) -> Iterator[Page]:
+        """Breadth-first crawl from ``seeds``, following links ``follow`` accepts"""
+        seen = set()
+        queue = deque()
+        for url in seeds:
+            url = urldefrag(url)[0]
+            if url not in seen:
+                seen.add(url)
+                queue.append(url)
+
+        done = 0
+        while queue and done < max_pages:
+            count = min(len(queue), max_pages - done, self.concurrency * 4)
+            batch = [queue.popleft() for _ in range(count)]
+            for page in self.iter_fetch(batch):
+                done += 1
+                yield page
+                if page.html is None:
+                    continue
+                for link in extract_links(page.html, page.url):
+                    link = urldefrag(urljoin(page.url, link))[0]
+                    if link not in seen and follow(link):
+                        seen.add(link)
+                        queue.append(link)
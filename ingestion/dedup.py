@@ -0,0 +1,221 @@
+"""Fragment consolidation and near-duplicate removal for scraped records.
+
+The extractors emit one record per ``<p>`` / ``<li>`` under a heading, and
+pages repeat boilerplate that differs only in a word or two.
+
+- ``consolidate`` merges consecutive fragments under the same heading of
+  the same page into one Q&A record (split at CONSOLIDATE_MAX_CHARS),
+  skipping fragments that are near-copies of one already in the unit.
+- ``NearDuplicateFilter`` drops records whose text is a near-duplicate of
+  one seen before, by MinHash over word shingles with LSH banding, so it
+  stays linear in the corpus size.
+
+Both work on record streams. ``python ingestion/dedup.py IN [OUT]``
+rewrites an existing faqs.jsonl and reports how much smaller it got.
+"""
+import argparse
+import hashlib
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+import numpy as np
+
+from records import RecordWriter, iter_records, record_hash, record_text
+
+# --------------------------------------------------
+# CONFIG
+# --------------------------------------------------
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))  # estimated Jaccard
+CONSOLIDATE_MAX_CHARS = int(os.getenv("CONSOLIDATE_MAX_CHARS", "1500"))
+
+SHINGLE_WORDS = 3
+NUM_PERM = 128
+BANDS = 32  # 4 rows per band: pairs at Jaccard 0.8 share a band >99.9% of the time
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(1919)
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+
+# --------------------------------------------------
+# MINHASH
+# --------------------------------------------------
+def body_field(record: dict) -> str:
+    return "answer" if "question" in record else "text"
+
+
+def heading_of(record: dict) -> str:
+    return record.get("question") or record.get("title", "")
+
+
+def shingles(text: str) -> Set[int]:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < SHINGLE_WORDS:
+        words = words or [""]
+        grams = {" ".join(words)}
+    else:
+        grams = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    return {
+        int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=4).digest(), "little") % _PRIME
+        for g in grams
+    }
+
+
+def minhash(text: str) -> np.ndarray:
+    x = np.fromiter(shingles(text), dtype=np.uint64)
+    # (a * x + b) mod p stays below 2**62 for 31-bit a, x and b
+    return ((np.outer(_A, x) + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures"""
+    return float(np.mean(a == b))
+
+
+class NearDuplicateFilter:
+    """Remembers signatures and rejects texts too similar to a kept one"""
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD):
+        self.threshold = threshold
+        self._rows = NUM_PERM // BANDS
+        self._buckets: Dict[Tuple[int, bytes], List[int]] = {}
+        self._signatures: List[np.ndarray] = []
+
+    def _bands(self, signature: np.ndarray):
+        for band in range(BANDS):
+            chunk = signature[band * self._rows:(band + 1) * self._rows]
+            yield band, chunk.tobytes()
+
+    def is_duplicate(self, text: str) -> bool:
+        """True if ``text`` is a near-duplicate; otherwise remember it"""
+        signature = minhash(text)
+        keys = list(self._bands(signature))
+        candidates = {i for key in keys for i in self._buckets.get(key, ())}
+        if any(similarity(signature, self._signatures[i]) >= self.threshold for i in candidates):
+            return True
+
+        self._signatures.append(signature)
+        for key in keys:
+            self._buckets.setdefault(key, []).append(len(self._signatures) - 1)
+        return False
+
+
+# --------------------------------------------------
+# PIPELINE
+# --------------------------------------------------
+class DedupStats:
+    """Sizes in characters of embedded text (record_text), before and after"""
+
+    def __init__(self):
+        self.fragments = 0
+        self.records = 0
+        self.dropped = 0
+        self.chars_in = 0
+        self.chars_out = 0
+
+    def summary(self) -> str:
+        saved = 1 - self.chars_out / self.chars_in if self.chars_in else 0.0
+        return (
+            f"{self.fragments} fragments → {self.records} records "
+            f"({self.dropped} near-duplicates dropped, "
+            f"{self.chars_in - self.chars_out} chars / {saved:.0%} smaller)"
+        )
+
+
+def consolidate(
+    records: Iterable[dict],
+    max_chars: int = CONSOLIDATE_MAX_CHARS,
+    threshold: float = DEDUP_THRESHOLD,
+    stats: DedupStats = None,
+) -> Iterator[dict]:
+    """Merge consecutive fragments sharing page, category and heading"""
+    unit = None
+    parts: List[str] = []
+    seen = None
+
+    def emit():
+        merged = {k: v for k, v in unit.items() if k != "content_hash"}
+        merged[body_field(unit)] = " ".join(parts)
+        merged["content_hash"] = record_hash(merged)
+        return merged
+
+    for record in records:
+        field = body_field(record)
+        text = record[field]
+        if stats:
+            stats.fragments += 1
+            stats.chars_in += len(record_text(record))
+
+        key = (record.get("source"), record.get("category"), heading_of(record), field)
+        same_unit = unit is not None and key == (
+            unit.get("source"), unit.get("category"), heading_of(unit), body_field(unit)
+        )
+        if same_unit and seen.is_duplicate(text):
+            if stats:
+                stats.dropped += 1
+            continue
+        if same_unit and len(" ".join(parts)) + 1 + len(text) <= max_chars:
+            parts.append(text)
+            continue
+
+        if unit is not None:
+            yield emit()
+        if not same_unit:
+            seen = NearDuplicateFilter(threshold)
+            seen.is_duplicate(text)
+        unit, parts = record, [text]
+
+    if unit is not None:
+        yield emit()
+
+
+def deduplicate(
+    records: Iterable[dict],
+    seen: NearDuplicateFilter = None,
+    stats: DedupStats = None,
+) -> Iterator[dict]:
+    """Drop records whose heading + text nearly repeats an earlier record.
+
+    Pass the same ``seen`` to calls over successive parts of a corpus.
+    """
+    seen = seen or NearDuplicateFilter()
+    for record in records:
+        if seen.is_duplicate(f"{heading_of(record)} {record[body_field(record)]}"):
+            if stats:
+                stats.dropped += 1
+            continue
+        if stats:
+            stats.records += 1
+            stats.chars_out += len(record_text(record))
+        yield record
+
+
+def clean_records(records: Iterable[dict], stats: DedupStats = None) -> Iterator[dict]:
+    """consolidate, then deduplicate across the whole stream"""
+    return deduplicate(consolidate(records, stats=stats), stats=stats)
+
+
+# --------------------------------------------------
+# CLI
+# --------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Consolidate and de-duplicate scraped records")
+    parser.add_argument("input", type=Path)
+    parser.add_argument("output", type=Path, nargs="?", help="Default: rewrite the input")
+    args = parser.parse_args()
+
+    stats = DedupStats()
+    output = args.output or args.input
+    # RecordWriter only replaces the file once the input is fully read
+    with RecordWriter(output) as writer:
+        writer.write_many(clean_records(iter_records(args.input), stats=stats))
+
+    print(f"✓ {stats.summary()}")
+    print(f"Saved to: {output.resolve()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Embedding backend selection and index metadata.
+
+EMBEDDING_BACKEND picks the provider used both to build the FAISS index
+and to embed queries:
+
+- ``gemini`` (default): Gemini embedding API, see gemini_embeddings.py
+- ``local``: offline hashing embeddings, see local_embeddings.py
+
+build_index.py writes the backend, model and dimension to ``meta.json``
+next to the index; loading an index with a different backend raises
+instead of returning meaningless neighbours.
+"""
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+from langchain_core.embeddings import Embeddings
+
+# --------------------------------------------------
+# CONFIG
+# --------------------------------------------------
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "gemini")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "models/embedding-001")
+LOCAL_EMBEDDING_DIM = int(os.getenv("LOCAL_EMBEDDING_DIM", "512"))
+
+META_FILE = "meta.json"
+
+
+class IndexMismatchError(ValueError):
+    """The index was built with different embeddings than the ones in use"""
+
+
+def get_embeddings_backend(name: Optional[str] = None) -> Embeddings:
+    """Create the embeddings for ``name`` (default: EMBEDDING_BACKEND)"""
+    name = name or EMBEDDING_BACKEND
+    if name == "gemini":
+        from gemini_embeddings import GeminiEmbeddings
+        return GeminiEmbeddings(model=EMBEDDING_MODEL)
+    if name == "local":
+        from local_embeddings import HashingEmbeddings
+        return HashingEmbeddings(dim=LOCAL_EMBEDDING_DIM)
+    raise ValueError(f"Unknown EMBEDDING_BACKEND: {name!r} (expected 'gemini' or 'local')")
+
+
+def backend_info(embeddings: Embeddings) -> dict:
+    return {
+        "backend": getattr(embeddings, "backend", type(embeddings).__name__),
+        "model": getattr(embeddings, "model", None),
+    }
+
+
+def read_index_meta(index_dir: Path) -> dict:
+    path = Path(index_dir) / META_FILE
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_index_meta(index_dir: Path, embeddings: Embeddings, dim: int, **extra):
+    meta = {**backend_info(embeddings), "dim": dim, **extra}
+    with open(Path(index_dir) / META_FILE, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def check_index_meta(index_dir: Path, embeddings: Embeddings, dim: int):
+    """Raise IndexMismatchError unless the index matches ``embeddings``"""
+    meta = read_index_meta(index_dir)
+    if not meta:
+        print(f"⚠️ No {META_FILE} in {index_dir}; cannot verify its embedding backend")
+        return
+
+    expected = backend_info(embeddings)
+    problems = [
+        f"{key}: index has {meta.get(key)!r}, configured {value!r}"
+        for key, value in expected.items()
+        if meta.get(key) != value
+    ]
+    if meta.get("dim") != dim:
+        problems.append(f"dim: meta.json says {meta.get('dim')}, index has {dim}")
+    expected_dim = getattr(embeddings, "dim", None)
+    if expected_dim is not None and expected_dim != dim:
+        problems.append(f"dim: index has {dim}, embeddings produce {expected_dim}")
+    if problems:
+        raise IndexMismatchError(
+            f"{index_dir} was built with other embeddings ({'; '.join(problems)}). "
+            "Rebuild it with ingestion/build_index.py or change EMBEDDING_BACKEND."
+        )
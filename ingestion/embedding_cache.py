@@ -0,0 +1,188 @@
+"""Query embedding cache: bounded in-process LRU plus optional SQLite store.
+
+The SQLite store is bounded too: each row carries the time it was last
+used, and once it holds more than EMBEDDING_CACHE_DISK_ENTRIES rows the
+least recently used ones are deleted. Writes (new vectors and last-used
+times) are buffered and committed EMBEDDING_CACHE_FLUSH_EVERY at a time,
+and at exit.
+"""
+import atexit
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# --------------------------------------------------
+# CONFIG
+# --------------------------------------------------
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+EMBEDDING_CACHE_DISK_ENTRIES = int(os.getenv("EMBEDDING_CACHE_DISK_ENTRIES", "100000"))
+EMBEDDING_CACHE_FLUSH_EVERY = int(os.getenv("EMBEDDING_CACHE_FLUSH_EVERY", "32"))
+
+# Set to an empty string to keep the cache in memory only
+EMBEDDING_CACHE_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH", "data/cache/query_embeddings.sqlite"
+)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def cache_key(text: str, model: str, task_type: str) -> str:
+    raw = f"{model}\x00{task_type}\x00{normalize_text(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """LRU of embeddings, backed by SQLite when a path is given"""
+
+    def __init__(
+        self,
+        max_entries: int = EMBEDDING_CACHE_SIZE,
+        path: Optional[str] = None,
+        max_disk_entries: int = EMBEDDING_CACHE_DISK_ENTRIES,
+        flush_every: int = EMBEDDING_CACHE_FLUSH_EVERY,
+    ):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.flush_every = flush_every
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        # key -> (vector blob, or None for a last-used update; last used)
+        self._pending: Dict[str, Tuple[Optional[bytes], float]] = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " key TEXT PRIMARY KEY,"
+                " vector BLOB NOT NULL,"
+                " last_used REAL NOT NULL DEFAULT 0)"
+            )
+            # Stores written before the bound have no last_used column
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(embeddings)")}
+            if "last_used" not in columns:
+                self._conn.execute("ALTER TABLE embeddings ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+            )
+            self._conn.commit()
+            atexit.register(self.flush)
+
+    def _remember(self, key: str, vector: List[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _queue(self, key: str, blob: Optional[bytes]):
+        """Buffer a disk write; a pending vector is never downgraded to a touch"""
+        if blob is None and key in self._pending:
+            blob = self._pending[key][0]
+        self._pending[key] = (blob, time.time())
+        if len(self._pending) >= self.flush_every:
+            self._flush()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                if self._conn is not None:
+                    self._queue(key, None)
+                return vector
+
+            if self._conn is not None:
+                pending = self._pending.get(key)
+                blob = pending[0] if pending else None
+                if blob is None:
+                    row = self._conn.execute(
+                        "SELECT vector FROM embeddings WHERE key = ?", (key,)
+                    ).fetchone()
+                    blob = row[0] if row else None
+                if blob is not None:
+                    vector = array("f", blob).tolist()
+                    self._remember(key, vector)
+                    self._queue(key, None)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return vector
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, vector: List[float]):
+        with self._lock:
+            self._remember(key, vector)
+            if self._conn is not None:
+                self._queue(key, array("f", vector).tobytes())
+
+    def _flush(self):
+        if not self._pending:
+            return
+        writes = [(k, blob, t) for k, (blob, t) in self._pending.items() if blob is not None]
+        touches = [(t, k) for k, (blob, t) in self._pending.items() if blob is None]
+        self._pending.clear()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", writes
+        )
+        self._conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?", touches)
+        excess = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] - self.max_disk_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN"
+                " (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+        self._conn.commit()
+
+    def flush(self):
+        """Commit buffered writes and prune the disk store to its bound"""
+        with self._lock:
+            if self._conn is not None:
+                self._flush()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._memory),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# Process-wide instance shared by every GeminiEmbeddings (and so every
+# Streamlit session)
+_shared_cache: Optional[EmbeddingCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_query_cache() -> EmbeddingCache:
+    """Get or create the shared query embedding cache"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            try:
+                _shared_cache = EmbeddingCache(path=EMBEDDING_CACHE_PATH or None)
+            except sqlite3.Error as e:
+                print(f"Embedding cache disk store unavailable ({e}), using memory only")
+                _shared_cache = EmbeddingCache()
+        return _shared_cache
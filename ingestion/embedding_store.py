@@ -0,0 +1,83 @@
+"""Persistent document embeddings keyed by content_hash.
+
+A record's content_hash changes whenever its scraped content changes, so
+(embedding model, content_hash) identifies a document vector exactly.
+build_index.py looks vectors up here before calling the embedding API
+and stores whatever it had to embed.
+"""
+import os
+import sqlite3
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+# --------------------------------------------------
+# CONFIG
+# --------------------------------------------------
+DOC_EMBEDDING_STORE_PATH = os.getenv(
+    "DOC_EMBEDDING_STORE_PATH", "data/cache/doc_embeddings.sqlite"
+)
+
+
+class EmbeddingStore:
+    """SQLite map of (model, content_hash) -> float32 vector"""
+
+    def __init__(self, path: str = DOC_EMBEDDING_STORE_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS doc_embeddings ("
+            " model TEXT NOT NULL,"
+            " content_hash TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " PRIMARY KEY (model, content_hash))"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get_many(self, model: str, hashes: Iterable[str]) -> Dict[str, List[float]]:
+        """Vectors for whichever of ``hashes`` are stored"""
+        hashes = list(hashes)
+        found = {}
+        with self._lock:
+            # Stay below SQLite's bound-parameter limit
+            for i in range(0, len(hashes), 500):
+                chunk = hashes[i:i + 500]
+                rows = self._conn.execute(
+                    "SELECT content_hash, vector FROM doc_embeddings"
+                    f" WHERE model = ? AND content_hash IN ({','.join('?' * len(chunk))})",
+                    (model, *chunk),
+                ).fetchall()
+                found.update((h, array("f", blob).tolist()) for h, blob in rows)
+        return found
+
+    def put_many(self, model: str, items: Iterable[Tuple[str, List[float]]]):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO doc_embeddings (model, content_hash, vector)"
+                " VALUES (?, ?, ?)",
+                [(model, h, array("f", v).tobytes()) for h, v in items],
+            )
+            self._conn.commit()
+
+    def count(self, model: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM doc_embeddings WHERE model = ?", (model,)
+            ).fetchone()[0]
+
+    def models(self) -> Dict[str, int]:
+        """Number of stored vectors per embedding model"""
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT model, COUNT(*) FROM doc_embeddings GROUP BY model"
+            ).fetchall())
+
+    def vectors(self, model: str) -> List[List[float]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT vector FROM doc_embeddings WHERE model = ?", (model,)
+            ).fetchall()
+        return [array("f", blob).tolist() for (blob,) in rows]
@@ -1,37 +1,84 @@
 """Custom Gemini Embeddings wrapper for LangChain"""
+import asyncio
 import os
 from typing import List
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 from langchain_core.embeddings import Embeddings
+from batch_embed import embed_batched
+from embedding_cache import cache_key, get_query_cache
+
+# Errors worth retrying: rate limits, timeouts and server-side failures
+RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+    ConnectionError,
+    TimeoutError,
+)
 
 
 class GeminiEmbeddings(Embeddings):
     """Gemini embeddings using google.generativeai"""
+
+    backend = "gemini"
     
-    def __init__(self, model: str = "models/embedding-001"):
+    def __init__(self, model: str = "models/embedding-001", cache=None):
         self.model = model
+        self.cache = cache if cache is not None else get_query_cache()
         api_key = os.getenv("GOOGLE_API_KEY")
         if not api_key:
             raise ValueError("GOOGLE_API_KEY not found in environment")
         genai.configure(api_key=api_key)
     
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        # A list of contents goes out as one batchEmbedContents request
+        result = genai.embed_content(
+            model=self.model,
+            content=texts,
+            task_type="retrieval_document"
+        )
+        return result["embedding"]
+
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        """Embed a list of documents"""
-        embeddings = []
-        for text in texts:
-            result = genai.embed_content(
-                model=self.model,
-                content=text,
-                task_type="retrieval_document"
-            )
-            embeddings.append(result["embedding"])
-        return embeddings
+        """Embed documents in batched, rate-limited, retried requests"""
+        return embed_batched(texts, self._embed_batch, retryable=RETRYABLE_ERRORS)
     
     def embed_query(self, text: str) -> List[float]:
-        """Embed a query"""
+        """Embed a query, served from the query cache when possible"""
+        key = cache_key(text, self.model, "retrieval_query")
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
         result = genai.embed_content(
             model=self.model,
             content=text,
             task_type="retrieval_query"
         )
+        self.cache.put(key, result["embedding"])
         return result["embedding"]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Async embed_query using the non-blocking Gemini client.
+
+        The cache may read and write SQLite, so it runs in a worker thread.
+        """
+        key = cache_key(text, self.model, "retrieval_query")
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            return cached
+
+        result = await genai.embed_content_async(
+            model=self.model,
+            content=text,
+            task_type="retrieval_query"
+        )
+        await asyncio.to_thread(self.cache.put, key, result["embedding"])
+        return result["embedding"]
+
+    def cache_stats(self) -> dict:
+        """Hit/miss stats of the query embedding cache"""
+        return self.cache.stats()
@@ -0,0 +1,182 @@
+"""On-disk FAISS index format without pickle.
+
+A directory holds:
+
+- ``index.faiss``: the FAISS index. For serving it is opened with
+  ``IO_FLAG_MMAP_IFC`` (zero-copy mmap of the vectors; plain
+  ``IO_FLAG_MMAP`` on older FAISS builds), so worker processes share the
+  page cache instead of each holding a copy.
+- ``docstore.sqlite``: one row per vector (position, docstore ID, text,
+  JSON metadata). Documents are read per search hit, so startup does not
+  read the corpus.
+- ``meta.json``: embedding backend and dimension (embedding_backends.py).
+
+Directories written by ``FAISS.save_local`` (``index.pkl``) still load.
+"""
+import json
+import sqlite3
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Iterator, List, Tuple, Union
+
+import faiss
+import numpy as np
+from langchain_community.docstore.base import Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "docstore.sqlite"
+
+# Zero-copy for flat indexes where supported; IO_FLAG_MMAP alone copies them
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+class _ReadOnlyDb:
+    def __init__(self, path: Path):
+        self._conn = sqlite3.connect(
+            f"file:{path}?mode=ro", uri=True, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+
+    def one(self, sql: str, params: tuple = ()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def all(self, sql: str, params: tuple = ()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+
+class SQLiteDocstore(Docstore):
+    """Read-only docstore that loads a document when it is looked up"""
+
+    def __init__(self, db: _ReadOnlyDb):
+        self._db = db
+
+    def search(self, search: str) -> Union[str, Document]:
+        row = self._db.one(
+            "SELECT page_content, metadata FROM docs WHERE id = ?", (search,)
+        )
+        if row is None:
+            return f"ID {search} not found."
+        return Document(id=search, page_content=row[0], metadata=json.loads(row[1]))
+
+
+class LazyIndexToDocstoreId(Mapping):
+    """FAISS position -> docstore ID, read from SQLite on access"""
+
+    def __init__(self, db: _ReadOnlyDb):
+        self._db = db
+
+    def __getitem__(self, position) -> str:
+        # FAISS hands back numpy integers
+        row = self._db.one("SELECT id FROM docs WHERE position = ?", (int(position),))
+        if row is None:
+            raise KeyError(position)
+        return row[0]
+
+    def __iter__(self) -> Iterator[int]:
+        return (p for (p,) in self._db.all("SELECT position FROM docs ORDER BY position"))
+
+    def __len__(self) -> int:
+        return self._db.one("SELECT COUNT(*) FROM docs")[0]
+
+
+def _create_docstore(db_path: Path) -> sqlite3.Connection:
+    db_path.unlink(missing_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE docs ("
+        " position INTEGER PRIMARY KEY,"
+        " id TEXT NOT NULL UNIQUE,"
+        " page_content TEXT NOT NULL,"
+        " metadata TEXT NOT NULL)"
+    )
+    return conn
+
+
+class IndexWriter:
+    """Fills a new index directory batch by batch.
+
+    Documents go straight to docstore.sqlite, so only the FAISS index
+    itself is held in memory while a large corpus is added.
+    """
+
+    def __init__(self, index_dir: Path, index: faiss.Index):
+        self.index_dir = Path(index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.index = index
+        self._conn = _create_docstore(self.index_dir / DOCSTORE_FILE)
+
+    def add(self, ids: List[str], texts: List[str], metadatas: List[dict], vectors: np.ndarray):
+        start = self.index.ntotal
+        self.index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+        self._conn.executemany(
+            "INSERT INTO docs VALUES (?, ?, ?, ?)",
+            [
+                (start + i, doc_id, text, json.dumps(meta, ensure_ascii=False))
+                for i, (doc_id, text, meta) in enumerate(zip(ids, texts, metadatas))
+            ],
+        )
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
+        faiss.write_index(self.index, str(self.index_dir / INDEX_FILE))
+
+
+def iter_indexed(vectorstore: FAISS) -> Iterator[Tuple[int, str, Document]]:
+    """(position, docstore ID, document) for every vector, without loading them all"""
+    if isinstance(vectorstore.docstore, SQLiteDocstore):
+        last = -1
+        while rows := vectorstore.docstore._db.all(
+            "SELECT position, id, page_content, metadata FROM docs"
+            " WHERE position > ? ORDER BY position LIMIT 1000",
+            (last,),
+        ):
+            for position, doc_id, text, meta in rows:
+                yield position, doc_id, Document(id=doc_id, page_content=text, metadata=json.loads(meta))
+            last = rows[-1][0]
+        return
+    for position, doc_id in vectorstore.index_to_docstore_id.items():
+        yield position, doc_id, vectorstore.docstore.search(doc_id)
+
+
+def load_index(index_dir: Path, embeddings, mmap: bool = True) -> FAISS:
+    """Load an index directory.
+
+    ``mmap=True`` (serving): memory-mapped, read-only vectors and lazy
+    document loading. ``mmap=False`` (rebuilding): everything in memory and
+    writable.
+    """
+    index_dir = Path(index_dir)
+    db_path = index_dir / DOCSTORE_FILE
+    if not db_path.exists():
+        # Directory from FAISS.save_local
+        return FAISS.load_local(
+            index_dir, embeddings=embeddings, allow_dangerous_deserialization=True
+        )
+
+    db = _ReadOnlyDb(db_path)
+    if mmap:
+        index = faiss.read_index(str(index_dir / INDEX_FILE), MMAP_FLAGS)
+        docstore = SQLiteDocstore(db)
+        index_to_docstore_id = LazyIndexToDocstoreId(db)
+    else:
+        index = faiss.read_index(str(index_dir / INDEX_FILE))
+        rows = db.all("SELECT position, id, page_content, metadata FROM docs")
+        docstore = InMemoryDocstore({
+            doc_id: Document(id=doc_id, page_content=text, metadata=json.loads(meta))
+            for _, doc_id, text, meta in rows
+        })
+        index_to_docstore_id = {position: doc_id for position, doc_id, _, _ in rows}
+
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=index_to_docstore_id,
+    )
@@ -0,0 +1,121 @@
+"""FAISS index types for larger corpora.
+
+INDEX_TYPE picks how build_index.py stores vectors. It is either a preset
+or any ``faiss.index_factory`` string:
+
+=========  ===============  ==========================================
+preset     factory string   trade-off
+=========  ===============  ==========================================
+flat       Flat             exact, 4 bytes/dim (default)
+sq_fp16    SQfp16           ~exact, half the memory
+sq8        SQ8              1 byte/dim, small recall loss
+ivf_flat   IVF{n},Flat      searches INDEX_NPROBE of n clusters
+ivf_sq8    IVF{n},SQ8       IVF + 1 byte/dim
+ivf_pq     IVF{n},PQ{m}     ~m bytes/vector, lowest memory and recall
+hnsw       HNSW32,Flat      graph search, fast, more memory, no deletes
+=========  ===============  ==========================================
+
+``n`` (IVF clusters) is derived from the corpus size and ``m`` (PQ
+sub-quantizers) from the dimension. Search-time knobs (INDEX_NPROBE,
+INDEX_EF_SEARCH) are applied when an index is loaded.
+"""
+import math
+import os
+import re
+
+import faiss
+import numpy as np
+
+# --------------------------------------------------
+# CONFIG
+# --------------------------------------------------
+INDEX_TYPE = os.getenv("INDEX_TYPE", "flat")
+INDEX_NPROBE = int(os.getenv("INDEX_NPROBE", "16"))
+INDEX_EF_SEARCH = int(os.getenv("INDEX_EF_SEARCH", "64"))
+
+# FAISS wants ~39 training points per centroid, for IVF lists and for
+# each PQ codebook (2 ** nbits centroids, 256 by default)
+MIN_POINTS_PER_CENTROID = 39
+PQ_DEFAULT_NBITS = 8
+
+PRESETS = ("flat", "sq_fp16", "sq8", "ivf_flat", "ivf_sq8", "ivf_pq", "hnsw")
+
+
+def ivf_lists(n: int) -> int:
+    return max(1, min(int(4 * math.sqrt(n)), n // MIN_POINTS_PER_CENTROID))
+
+
+def pq_subquantizers(d: int) -> int:
+    # 8 dims per sub-quantizer, and m must divide d
+    m = max(1, d // 8)
+    while d % m:
+        m -= 1
+    return m
+
+
+def pq_centroids(spec: str) -> int:
+    """Centroids per PQ codebook in ``spec`` ("PQ16" -> 256, "PQ16x4" -> 16), 0 without PQ"""
+    match = re.search(r"PQ\d+(?:x(\d+))?", spec)
+    if match is None:
+        return 0
+    return 2 ** int(match.group(1) or PQ_DEFAULT_NBITS)
+
+
+def training_points(spec: str, n: int) -> int:
+    """Vectors FAISS wants to train ``spec`` for a corpus of ``n``"""
+    needs = 0
+    if spec.startswith("IVF"):
+        needs = MIN_POINTS_PER_CENTROID * ivf_lists(n)
+    return max(needs, MIN_POINTS_PER_CENTROID * pq_centroids(spec))
+
+
+def resolve(index_type: str, n: int, d: int) -> str:
+    """factory string for a preset (or the string itself) and corpus shape"""
+    nlist = ivf_lists(n)
+    presets = {
+        "flat": "Flat",
+        "sq_fp16": "SQfp16",
+        "sq8": "SQ8",
+        "ivf_flat": f"IVF{nlist},Flat",
+        "ivf_sq8": f"IVF{nlist},SQ8",
+        "ivf_pq": f"IVF{nlist},PQ{pq_subquantizers(d)}",
+        "hnsw": "HNSW32,Flat",
+    }
+    spec = presets.get(index_type, index_type)
+
+    # Too few vectors to train the quantizers: exact search is cheap anyway
+    if n < training_points(spec, n):
+        print(f"⚠️ {n} vectors are too few to train {spec}; using Flat")
+        return "Flat"
+    return spec
+
+
+def new_index(d: int, spec: str) -> faiss.Index:
+    """Empty (untrained, for IVF / PQ) L2 index of type ``spec``"""
+    return faiss.index_factory(d, spec, faiss.METRIC_L2)
+
+
+def build(vectors: np.ndarray, spec: str) -> faiss.Index:
+    """Train (if needed) and fill an L2 index; positions follow ``vectors``"""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    index = new_index(vectors.shape[1], spec)
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    apply_search_params(index)
+    return index
+
+
+def apply_search_params(index: faiss.Index):
+    """Set nprobe / efSearch where the index type has them"""
+    params = faiss.ParameterSpace()
+    for name, value in (("nprobe", INDEX_NPROBE), ("efSearch", INDEX_EF_SEARCH)):
+        try:
+            params.set_index_parameter(index, name, value)
+        except RuntimeError:
+            pass  # not an IVF / HNSW index
+
+
+def is_exact_flat(index: faiss.Index) -> bool:
+    """Flat indexes hold the original vectors, so reconstruct() is exact"""
+    return isinstance(faiss.downcast_index(index), faiss.IndexFlat)
@@ -0,0 +1,58 @@
+"""Offline CPU embeddings: signed feature hashing of words and word pairs.
+
+No model file and no network: a text's vector depends only on its words,
+so documents and queries embedded in different processes (or on a CI box)
+line up. Quality is lexical rather than semantic, which is enough for an
+FAQ set of this size and makes the whole pipeline runnable offline.
+"""
+import hashlib
+import math
+import re
+from collections import Counter
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbeddings(Embeddings):
+    """Unit-length hashed bag of unigrams and bigrams, sublinear TF"""
+
+    backend = "local"
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        # Bump when the features change so old indexes are rejected at load
+        self.model = f"hashing-v1-{dim}"
+
+    def _features(self, text: str) -> Counter:
+        words = _WORD_RE.findall(text.lower())
+        features = Counter(words)
+        features.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+        return features
+
+    def _vector(self, text: str) -> List[float]:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for feature, tf in self._features(text).items():
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            h = int.from_bytes(digest, "little")
+            # One hash bit picks the sign so collisions cancel out on average
+            sign = 1.0 if h & 1 else -1.0
+            vec[(h >> 1) % self.dim] += sign * (1.0 + math.log(tf))
+        norm = np.linalg.norm(vec)
+        if norm:
+            vec /= norm
+        else:
+            vec[0] = 1.0
+        return vec.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._vector(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self._vector(text)
@@ -0,0 +1,109 @@
+"""Helpers shared by everything that reads the scraped FAQ records.
+
+The scraper writes one JSON record per line (``faqs.jsonl``) as pages
+finish; readers stream them with ``iter_records``. A JSON array
+(``faqs.json``) is still accepted wherever records are read.
+"""
+import hashlib
+import json
+import os
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def record_hash(record: dict) -> str:
+    """content_hash of a scraped record, computed exactly as scrape_faq.py does"""
+    body = {k: v for k, v in record.items() if k != "content_hash"}
+    return hashlib.sha256(
+        json.dumps(body, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+
+
+def record_text(record: dict) -> str:
+    """Text that gets embedded for a record"""
+    if "question" in record:
+        return f"Question: {record['question']}\nAnswer: {record['answer']}"
+    return record["text"]
+
+
+def split_record_text(text: str) -> Optional[Tuple[str, str]]:
+    """(question, answer) back out of a Q&A record_text, else None"""
+    if not text.startswith("Question: ") or "\nAnswer: " not in text:
+        return None
+    question, answer = text[len("Question: "):].split("\nAnswer: ", 1)
+    return question, answer
+
+
+def iter_records(path: Path) -> Iterator[dict]:
+    """Stream scraped records, filling in content_hash where it is missing"""
+    path = Path(path)
+    with open(path, encoding="utf-8") as f:
+        if path.suffix == ".jsonl":
+            records = (json.loads(line) for line in f if line.strip())
+        else:
+            records = json.load(f)
+
+        for record in records:
+            if "content_hash" not in record:
+                record["content_hash"] = record_hash(record)
+            yield record
+
+
+def load_records(path: Path) -> List[dict]:
+    """All scraped records in memory; prefer ``iter_records`` for large files"""
+    return list(iter_records(path))
+
+
+def dumps_record(record: dict) -> str:
+    """One line of faqs.jsonl"""
+    return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+class RecordWriter:
+    """Appends records to a JSONL file that replaces ``path`` on success.
+
+    Records are flushed as they are written, so memory does not grow with
+    the corpus; if the writer exits with an error ``path`` is untouched.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.tmp_path = self.path.with_name(f"{self.path.name}.tmp-{os.getpid()}")
+        self.count = 0
+
+    def __enter__(self) -> "RecordWriter":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.tmp_path, "w", encoding="utf-8")
+        return self
+
+    def write_many(self, records: Iterable[dict]):
+        for record in records:
+            self._file.write(dumps_record(record))
+            self.count += 1
+        self._file.flush()
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        if exc_type is None:
+            os.replace(self.tmp_path, self.path)
+        else:
+            self.tmp_path.unlink(missing_ok=True)
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Consecutive lists of ``size`` items (the last one may be shorter)"""
+    items = iter(items)
+    while batch := list(islice(items, size)):
+        yield batch
+
+
+def record_metadata(record: dict) -> dict:
+    """Metadata stored with a record's document in every index"""
+    return {
+        "category": record["category"],
+        "source": record["source"],
+        "content_hash": record["content_hash"],
+    }
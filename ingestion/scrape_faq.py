@@ -1,9 +1,15 @@
-import requests
+import argparse
 import json
 import hashlib
+import os
 import re
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from pathlib import Path
+from urllib.parse import urlparse
+
+from crawler import Fetcher, HttpCache
+from dedup import DedupStats, NearDuplicateFilter, consolidate, deduplicate
+from records import RecordWriter
 
 
 
@@ -20,13 +26,24 @@ FAQ_PAGES = {"orders", "gift_card", "payment", "shipping", "returns"}
 ABOUT_PAGES = {"about"}
 
 OUTPUT_DIR = Path("data/processed")
-OUTPUT_FILE = OUTPUT_DIR / "faqs.json"
+OUTPUT_FILE = OUTPUT_DIR / "faqs.jsonl"
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (CustomerSupportBot/1.0)"
 }
 
+# "strained" parses only <main> and strips noise in one walk; "legacy"
+# parses the whole page. Both produce the same entries.
+SCRAPE_PARSER = os.getenv("SCRAPE_PARSER", "strained")
+
+# Bump when the extractors change what they return for the same page, so
+# entries parsed by the old code are re-parsed from the cached body
+EXTRACTOR_VERSION = 1
+
+NOISE_TAGS = ("header", "footer", "nav", "script", "style", "noscript", "form")
+NOISE_CLASSES = ("call-us", "call-wrap", "support", "contact", "contact-us")
+
 
 def clean_text(text: str) -> str:
     return re.sub(r"\s+", " ", text).strip()
@@ -35,19 +52,57 @@ def hash_content(text: str) -> str:
     return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
 def remove_noise(soup: BeautifulSoup):
-    for tag in soup([
-        "header", "footer", "nav", "script",
-        "style", "noscript", "form"
-    ]):
+    for tag in soup(list(NOISE_TAGS)):
         tag.decompose()
 
-    for cls in [
-        "call-us", "call-wrap", "support",
-        "contact", "contact-us"
-    ]:
+    for cls in NOISE_CLASSES:
         for div in soup.find_all(class_=cls):
             div.decompose()
 
+
+def is_noise(el) -> bool:
+    return el.name in NOISE_TAGS or any(c in NOISE_CLASSES for c in el.get("class") or ())
+
+
+def strip_noise(root):
+    """remove_noise in a single walk over ``root``'s descendants"""
+    for el in root.find_all(True):
+        # Already gone with a removed ancestor
+        if not el.decomposed and is_noise(el):
+            el.decompose()
+
+
+def parse_main(html: str):
+    """Cleaned first <main> element, parsing nothing outside it.
+
+    None when the page has no usable <main> (missing or noise itself);
+    callers then fall back to the full-page parse.
+    Assumes <main> is not nested inside a noise element, as on every
+    page of the site.
+    """
+    soup = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer("main"))
+    main = soup.find("main")
+    if main is None or is_noise(main):
+        return None
+    strip_noise(main)
+    return main
+
+
+def parse_page_root(html: str, fallbacks=()):
+    """Element the extractors walk: <main>, else ``fallbacks``, else the page"""
+    if SCRAPE_PARSER == "strained":
+        main = parse_main(html)
+        if main is not None:
+            return main
+
+    soup = BeautifulSoup(html, "html.parser")
+    remove_noise(soup)
+    for name in ("main", *fallbacks):
+        found = soup.find(name)
+        if found:
+            return found
+    return soup
+
 def is_cta_text(text: str) -> bool:
     cta_phrases = [
         "whatsapp us",
@@ -63,10 +118,7 @@ def is_cta_text(text: str) -> bool:
               
 
 def extract_faq_sections(html: str, page_name: str, url: str):
-    soup = BeautifulSoup(html, "html.parser")
-    remove_noise(soup)
-
-    main = soup.find("main") or soup
+    main = parse_page_root(html)
 
     faqs = []
     current_question = None
@@ -96,10 +148,7 @@ def extract_faq_sections(html: str, page_name: str, url: str):
     return faqs
 
 def extract_about_content(html: str, url: str):
-    soup = BeautifulSoup(html, "html.parser")
-    remove_noise(soup)
-
-    main = soup.find("main") or soup.find("article") or soup
+    main = parse_page_root(html, fallbacks=("article",))
 
     sections = []
     for p in main.find_all("p"):
@@ -115,40 +164,104 @@ def extract_about_content(html: str, url: str):
     return sections
 
 
-def main():
-    all_docs = []
+def parse_page(page_name: str, html: str, url: str):
+    if page_name in ABOUT_PAGES:
+        docs = extract_about_content(html, url)
+    else:
+        # FAQ_PAGES and pages discovered by --crawl
+        docs = extract_faq_sections(html, page_name, url)
 
-    for page_name, url in FAQ_URLS.items():
-        print(f"Scraping {page_name} → {url}")
+    for d in docs:
+        d["content_hash"] = hash_content(
+            json.dumps(d, ensure_ascii=False)
+        )
+    return docs
 
-        try:
-            res = requests.get(url, headers=HEADERS, timeout=20)
-            res.raise_for_status()
-            html = res.text
 
-            if page_name in FAQ_PAGES:
-                docs = extract_faq_sections(html, page_name, url)
-            elif page_name in ABOUT_PAGES:
-                docs = extract_about_content(html, url)
-            else:
-                docs = []
+# --------------------------------------------------
+# CRAWL MODE
+# --------------------------------------------------
+CRAWL_PATH_PREFIX = "/pages/"
+
+
+def page_name_for(url: str) -> str:
+    """Known FAQ_URLS keep their name; other pages use their URL slug"""
+    for name, known in FAQ_URLS.items():
+        if known == url:
+            return name
+    return urlparse(url).path.rstrip("/").rsplit("/", 1)[-1].replace("-", "_")
+
 
-            for d in docs:
-                d["content_hash"] = hash_content(
-                    json.dumps(d, ensure_ascii=False)
-                )
-                all_docs.append(d)
+def extract_links(html: str, url: str):
+    anchors = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer("a"))
+    return [a["href"] for a in anchors.find_all("a", href=True)]
 
-            print(f"  Extracted {len(docs)} clean entries")
 
-        except Exception as e:
-            print(f"  Failed: {e}")
+def same_site_pages(seeds):
+    hosts = {urlparse(u).netloc for u in seeds}
 
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(all_docs, f, indent=2, ensure_ascii=False)
+    def follow(url: str) -> bool:
+        parsed = urlparse(url)
+        return (
+            parsed.scheme in ("http", "https")
+            and parsed.netloc in hosts
+            and parsed.path.startswith(CRAWL_PATH_PREFIX)
+            and not parsed.query
+        )
+    return follow
 
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape the FAQ pages into faqs.jsonl")
+    parser.add_argument("--crawl", action="store_true", help=f"Follow same-site {CRAWL_PATH_PREFIX} links from FAQ_URLS")
+    parser.add_argument("--max-pages", type=int, default=200, help="Page limit for --crawl")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore the HTTP cache and refetch everything")
+    parser.add_argument("--no-dedup", action="store_true", help="Keep one record per fragment, near-duplicates included")
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else HttpCache(parser_key=f"{SCRAPE_PARSER}-v{EXTRACTOR_VERSION}")
+    fetcher = Fetcher(headers=HEADERS, cache=cache)
+
+    seeds = list(FAQ_URLS.values())
+    if args.crawl:
+        pages = fetcher.crawl(seeds, same_site_pages(seeds), extract_links, max_pages=args.max_pages)
+    else:
+        pages = fetcher.iter_fetch(seeds)
+
+    dedup_stats = None if args.no_dedup else DedupStats()
+    seen = NearDuplicateFilter()
+
+    # Each page's records are written as soon as it is parsed
+    with RecordWriter(OUTPUT_FILE) as writer:
+        for page in pages:
+            page_name = page_name_for(page.url)
+            if page.html is None:
+                continue
+
+            if page.not_modified and page.parsed is not None:
+                docs = page.parsed
+                print(f"Unchanged {page_name} → {page.url} ({len(docs)} cached entries)")
+            else:
+                print(f"Scraping {page_name} → {page.url}")
+                try:
+                    docs = parse_page(page_name, page.html, page.url)
+                except Exception as e:
+                    print(f"  Failed: {e}")
+                    continue
+                if cache:
+                    cache.set_parsed(page.url, docs)
+                print(f"  Extracted {len(docs)} clean entries")
+
+            if dedup_stats:
+                docs = deduplicate(consolidate(docs, stats=dedup_stats), seen, stats=dedup_stats)
+            writer.write_many(docs)
+
+    stats = fetcher.stats
     print("\nScraping complete")
-    print(f"Total documents: {len(all_docs)}")
+    print(f"Pages: {stats['fetched']} fetched, {stats['not_modified']} not modified, {stats['failed']} failed")
+    if dedup_stats:
+        print(f"Consolidation: {dedup_stats.summary()}")
+    print(f"Total documents: {writer.count}")
     print(f"Saved to: {OUTPUT_FILE.resolve()}")
 
 
@@ -0,0 +1,9 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Same layout the app and the benchmarks run with: the repo root for
+# ``agents``/``db`` and ingestion/ for its flat modules
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "ingestion"))
@@ -0,0 +1,92 @@
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from agents import metrics
+from agents.answer_cache import SemanticAnswerCache, normalize_query
+from local_embeddings import HashingEmbeddings
+
+TEXTS = {
+    "h-track": "Question: How do I track my order?\nAnswer: Use the tracking link in your email.",
+    "h-return": "Question: Can I return an item?\nAnswer: Returns are accepted within 14 days.",
+}
+
+
+@pytest.fixture
+def embeddings():
+    return HashingEmbeddings(dim=256)
+
+
+def build_index(embeddings, hashes):
+    return FAISS.from_texts(
+        [TEXTS[h] for h in hashes],
+        embeddings,
+        metadatas=[{"content_hash": h} for h in hashes],
+    )
+
+
+def doc(content_hash):
+    return Document(page_content=TEXTS[content_hash], metadata={"content_hash": content_hash})
+
+
+@pytest.fixture
+def served(embeddings):
+    # The cache asks for the served index on each refresh
+    return {"index": build_index(embeddings, ["h-track", "h-return"])}
+
+
+def make_cache(served, **kwargs):
+    return SemanticAnswerCache(index=lambda: served["index"], **kwargs)
+
+
+def test_normalize_query():
+    assert normalize_query("  How do I TRACK my order?! ") == "how do i track my order"
+
+
+def test_exact_hit_without_embedding(served):
+    cache = make_cache(served)
+    cache.put("How do I track my order?", "Use the link.", [doc("h-track")])
+    assert cache.get("how do i track my order") == "Use the link."
+    assert cache.get("how do I return an item") is None
+
+
+def test_semantic_hit_only_when_enabled(served, embeddings):
+    query, paraphrase = "how do I track my order", "how do I track my order please"
+    for semantic, expected in ((False, None), (True, "Use the link.")):
+        cache = make_cache(served, semantic=semantic, threshold=0.8)
+        assert cache.get(query, embeddings.embed_query(query)) is None
+        cache.put(query, "Use the link.", [doc("h-track")])
+        assert cache.get(paraphrase, embeddings.embed_query(paraphrase)) == expected
+
+
+def test_replaced_index_invalidates_entries_of_removed_documents(served, embeddings):
+    metrics.reset()
+    cache = make_cache(served)
+    cache.put("track order", "Use the link.", [doc("h-track")])
+    cache.put("return item", "Within 14 days.", [doc("h-return")])
+
+    # Same index: nothing is re-read or dropped
+    assert cache.get("track order") == "Use the link."
+
+    served["index"] = build_index(embeddings, ["h-return"])
+    assert cache.get("track order") is None
+    assert cache.get("return item") == "Within 14 days."
+    assert metrics.counter_value("answer_cache_invalidations_total") == 1
+
+
+def test_answers_without_hashes_are_not_cached(served):
+    cache = make_cache(served)
+    cache.put("track order", "Use the link.", [Document(page_content="no hash")])
+    assert cache.get("track order") is None
+
+
+def test_ttl_and_lru(served):
+    cache = make_cache(served, max_entries=1)
+    cache.put("track order", "a", [doc("h-track")])
+    cache.put("return item", "b", [doc("h-return")])
+    assert cache.get("track order") is None
+    assert cache.get("return item") == "b"
+
+    expired = make_cache(served, ttl_seconds=-1)
+    expired.put("track order", "a", [doc("h-track")])
+    assert expired.get("track order") is None
@@ -0,0 +1,42 @@
+import pytest
+
+from bm25 import BM25Index, reciprocal_rank_fusion, tokenize
+
+DOCS = [
+    {"page_content": "Question: How do I track my order?\nAnswer: Use the tracking link in your email.", "metadata": {"id": 0}},
+    {"page_content": "Question: Can I return an item?\nAnswer: Returns are accepted within 14 days.", "metadata": {"id": 1}},
+    {"page_content": "Question: Do gift cards expire?\nAnswer: Gift cards are valid for one year.", "metadata": {"id": 2}},
+]
+
+
+def test_tokenize_drops_stopwords_and_plural_s():
+    assert tokenize("How do I track my Orders?") == ["track", "order"]
+
+
+def test_search_ranks_matching_document_first():
+    index = BM25Index.build(DOCS)
+    hits = index.search("track order", k=3)
+    assert hits[0][0] == 0
+    assert index.search("gift card expiry")[0][0] == 2
+    assert index.search("completely unrelated words") == []
+
+
+def test_coverage_weighs_query_terms():
+    index = BM25Index.build(DOCS)
+    assert index.coverage("return item", 1) == 1.0
+    assert 0.0 < index.coverage("return pizza", 1) < 1.0
+    assert index.coverage("", 1) == 0.0
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = BM25Index.build(DOCS)
+    index.save(tmp_path / "bm25.json")
+    loaded = BM25Index.load(tmp_path / "bm25.json")
+    assert loaded.search("gift card") == index.search("gift card")
+    assert loaded.docs == DOCS
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "c", "d"]], k=60)
+    assert [key for key, _ in fused] == ["b", "c", "a", "d"]
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61)
@@ -0,0 +1,79 @@
+import operator
+from typing import Annotated, List, TypedDict
+
+import pytest
+from langgraph.graph import END, StateGraph
+
+from db.database import SQLiteCheckpointer
+
+
+class State(TypedDict):
+    turns: Annotated[List[str], operator.add]
+
+
+def build(checkpointer):
+    graph = StateGraph(State)
+    graph.add_node("echo", lambda s: {"turns": ["reply"]})
+    graph.set_entry_point("echo")
+    graph.add_edge("echo", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+@pytest.fixture
+def checkpointer(tmp_path):
+    cp = SQLiteCheckpointer(path=str(tmp_path / "checkpoints.sqlite"), keep_last=2, flush_seconds=60)
+    yield cp
+    cp.close()
+
+
+def config(thread_id):
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def test_state_survives_reopening(tmp_path, checkpointer):
+    agent = build(checkpointer)
+    agent.invoke({"turns": ["hi"]}, config("a"))
+    agent.invoke({"turns": ["again"]}, config("a"))
+    checkpointer.close()
+
+    reopened = SQLiteCheckpointer(path=checkpointer.path)
+    try:
+        state = build(reopened).get_state(config("a"))
+        assert state.values["turns"] == ["hi", "reply", "again", "reply"]
+    finally:
+        reopened.close()
+
+
+def test_reads_see_buffered_writes(checkpointer):
+    agent = build(checkpointer)
+    agent.invoke({"turns": ["hi"]}, config("a"))
+    # flush_seconds is long, so the writes are still buffered here
+    assert agent.get_state(config("a")).values["turns"] == ["hi", "reply"]
+
+
+def test_compaction_keeps_last_checkpoints(checkpointer):
+    agent = build(checkpointer)
+    for turn in range(5):
+        agent.invoke({"turns": [str(turn)]}, config("a"))
+    checkpointer.flush()
+
+    rows = checkpointer.conn.execute(
+        "SELECT COUNT(*) FROM checkpoints WHERE thread_id = 'a'"
+    ).fetchone()[0]
+    assert rows == 2
+    assert len(list(checkpointer.list(config("a")))) == 2
+    assert agent.get_state(config("a")).values["turns"][-2:] == ["4", "reply"]
+
+
+def test_delete_and_prune_threads(checkpointer):
+    agent = build(checkpointer)
+    for thread_id in ("a", "b", "c"):
+        agent.invoke({"turns": ["hi"]}, config(thread_id))
+    assert checkpointer.thread_count() == 3
+
+    checkpointer.delete_thread("a")
+    assert checkpointer.thread_count() == 2
+    assert checkpointer.get_tuple(config("a")) is None
+
+    assert checkpointer.prune_idle(ttl_seconds=-1) == 2
+    assert checkpointer.thread_count() == 0
@@ -0,0 +1,86 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from crawler import Fetcher, HttpCache
+
+BODY = "<html><main><h2>Question?</h2><p>Answer.</p></main></html>"
+ETAG = '"v1"'
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+class Handler(BaseHTTPRequestHandler):
+    # path -> validators the page is served with
+    validators = {
+        "/etag": {"ETag": ETAG},
+        "/last-modified": {"Last-Modified": LAST_MODIFIED},
+    }
+    requests = []
+
+    def do_GET(self):
+        headers = self.validators[self.path]
+        not_modified = any(
+            self.headers.get(request) is not None and self.headers.get(request) == headers.get(response)
+            for request, response in (("If-None-Match", "ETag"), ("If-Modified-Since", "Last-Modified"))
+        )
+        self.requests.append((self.path, dict(self.headers)))
+        self.send_response(304 if not_modified else 200)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if not_modified:
+            self.end_headers()
+            return
+        body = BODY.encode("utf-8")
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    Handler.requests = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def fetcher(cache):
+    return Fetcher(cache=cache, concurrency=2, host_delay=0)
+
+
+@pytest.mark.parametrize("path", ["/etag", "/last-modified"])
+def test_not_modified_reuses_cached_parse(tmp_path, server, path):
+    url = server + path
+    cache = HttpCache(tmp_path, parser_key="strained-v1")
+
+    first = fetcher(cache).fetch(url)
+    assert (first.status, first.not_modified, first.html) == (200, False, BODY)
+    cache.set_parsed(url, [{"question": "Question?", "answer": "Answer."}])
+
+    second = fetcher(cache).fetch(url)
+    assert (second.status, second.not_modified, second.html) == (304, True, BODY)
+    assert second.parsed == [{"question": "Question?", "answer": "Answer."}]
+
+    sent = Handler.requests[-1][1]
+    assert sent.get("If-None-Match") == ETAG or sent.get("If-Modified-Since") == LAST_MODIFIED
+
+
+def test_parse_from_another_parser_is_a_miss(tmp_path, server):
+    url = server + "/etag"
+    cache = HttpCache(tmp_path, parser_key="strained-v1")
+    fetcher(cache).fetch(url)
+    cache.set_parsed(url, [{"question": "Question?", "answer": "Answer."}])
+
+    other = fetcher(HttpCache(tmp_path, parser_key="legacy-v1"))
+    page = other.fetch(url)
+    # The body is still valid, only the parse is not reused
+    assert (page.status, page.not_modified, page.html, page.parsed) == (304, True, BODY, None)
+    assert other.stats == {"fetched": 0, "not_modified": 1, "failed": 0}
@@ -0,0 +1,52 @@
+from dedup import NearDuplicateFilter, consolidate, deduplicate
+from records import record_hash
+
+ANSWER = (
+    "You can return most items within 14 days of delivery as long as they are "
+    "unused and in their original packaging with all tags attached"
+)
+
+
+def fragment(text, question="How do I return an item?", source="https://example.com/returns"):
+    record = {"source": source, "category": "returns", "question": question, "answer": text}
+    record["content_hash"] = record_hash(record)
+    return record
+
+
+def test_filter_rejects_near_duplicates_only():
+    seen = NearDuplicateFilter(threshold=0.8)
+    assert not seen.is_duplicate(ANSWER)
+    assert seen.is_duplicate(ANSWER)
+    assert seen.is_duplicate(ANSWER + " please")
+    assert not seen.is_duplicate("Gift cards can be used online and in any of our stores")
+
+
+def test_consolidate_merges_fragments_under_one_heading():
+    records = [
+        fragment("Returns are free."),
+        fragment("Refunds take 5 days."),
+        fragment("Cards never expire.", question="Do gift cards expire?"),
+    ]
+    merged = list(consolidate(records))
+
+    assert [r["answer"] for r in merged] == ["Returns are free. Refunds take 5 days.", "Cards never expire."]
+    # The merged record gets a hash of its own content
+    assert merged[0]["content_hash"] == record_hash(merged[0])
+
+
+def test_consolidate_skips_repeated_fragments_and_splits_long_units():
+    merged = list(consolidate([fragment(ANSWER), fragment(ANSWER + "."), fragment("Short extra note.")]))
+    assert merged[0]["answer"] == f"{ANSWER} Short extra note."
+
+    split = list(consolidate([fragment("a " * 10), fragment("b " * 10)], max_chars=25))
+    assert len(split) == 2
+
+
+def test_deduplicate_across_pages():
+    records = [
+        fragment(ANSWER),
+        fragment(ANSWER, source="https://example.com/faq"),
+        fragment("Gift cards can be used online", question="Where can I use my gift card?"),
+    ]
+    kept = list(deduplicate(records))
+    assert [r["source"] for r in kept] == ["https://example.com/returns", "https://example.com/returns"]